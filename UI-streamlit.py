@@ -1,29 +1,44 @@
-import streamlit as st
+import os
+import tempfile
+import time
+import uuid
+
+import altair as alt
 import pandas as pd
-import numpy as np
-import cloudpickle
+import streamlit as st
+
+from erdc import jobs, metrics
+from erdc.batch import run_batch
+from erdc.cache import prediction_cache
+from erdc.engine import predict_compressive, predict_layers, predict_printed_strength, predict_rheology
+from erdc.mix import (
+    AGES, compressive_features_list, compressive_thresholds, compute_nc, extra_features,
+    fiber_type_options, rheology_models, rheology_ranges, scm_defaults,
+)
+from erdc.optimize import (
+    LAYERS_COLUMN, PRINTED_STRENGTH_COLUMN, PRINTING_MAX_CANDIDATES, PRINTING_RANGES, PRINTING_STEPS,
+    SEARCH_VARIABLES, STRENGTH_COLUMNS, STRENGTH_MAX_CANDIDATES,
+    GridSpec, optimize_pareto, optimize_printing, optimize_strength, printing_grid_size,
+)
+from erdc.neighbors import domain_columns
+from erdc.resources import load_database, load_models, load_neighbors, load_surfaces
+from erdc.sensitivity import DISCRETE_INPUTS, INPUT_RANGES, TARGETS as SENSITIVITY_TARGETS
+from erdc.sensitivity import axis_values, sweep, sweepable_inputs, target_features
+
+rerun_started = time.perf_counter()
 
 # === Load input feature names from correct file ===
+# Parsed once per process and shared by all sessions; reloaded when the file changes
 file_path = '3D-DB-Nov-2025.xlsx'  # Must match training file exactly
-df_C_S = pd.read_excel(file_path, sheet_name=0, engine='openpyxl')
-df_R = pd.read_excel(file_path, sheet_name=1, engine='openpyxl')
-df_3D_L = pd.read_excel(file_path, sheet_name=2, engine="openpyxl")     # Layer
-df_3D_S = pd.read_excel(file_path, sheet_name=3, engine="openpyxl")     # Strength
-
-# Explicit input feature names (MODEL KEYS — do not change)
-compressive_features_list = [
-    'Cement content (%)', 'Limestone content (%)', 'Silica fume content (%)',
-    'SCM content (%)', 'Nc', 'SSA of SCM (m2/g)', 'Water/Binder',
-    'Sand/Binder', 'Aggregate/Binder', 'Fiber length (mm)', 'Fiber Volume (%)',
-    'Fiber Type', 'Age'
-]
-
-rheology_features_list = [
-    'Cement content (%)', 'Limestone content (%)', 'Silica fume content (%)',
-    'SCM content (%)', 'Nc', 'SSA of SCM (m2/g)', 'Water/Binder',
-    'Sand/Binder', 'Aggregate/Binder', 'Fiber length (mm)', 'Fiber Volume (%)',
-    'Fiber Type', 'Mini-slump after joint'
-]
+database = load_database(file_path)
+df_C_S = database["df_C_S"]
+df_R = database["df_R"]
+df_3D_L = database["df_3D_L"]     # Layer
+df_3D_S = database["df_3D_S"]     # Strength
+# KD-tree per sheet for nearest measured mixes / applicability domain (erdc.neighbors)
+neighbors = load_neighbors(file_path)
+
+# Explicit input feature names (MODEL KEYS) live in erdc.mix
 
 # Display labels (UI ONLY)
 feature_labels = {
@@ -57,25 +72,10 @@ feature_labels = {
     "single layer height (mm)": "Single Layer Thickness (mm, 10–25)",
 }
 
-# Additional inputs for Nc calculation (MODEL KEYS)
-extra_features = ['CaO in SCM', 'Al2O3 in SCM', 'SiO2 in SCM']
-
-# Predefined SCM compositions: [SSA, CaO, Al2O3, SiO2]
-# (Keep numeric values as you had; labels for SSA/CaO/Al2O3/SiO2 are handled via feature_labels)
-scm_defaults = {
-    "Calcined clay": [12.067, 0.73, 35.27, 57.05],
-    "F fly ash": [2.153, 11.83, 19.48, 43.59],
-    "C fly ash": [2.973, 29.51, 18.07, 37.29],
-    "Ground granulated blast furnace slag": [1.084, 42.73, 8.58, 35.9],
-    "MSWI ash": [12.086, 52.85, 6.85, 12.91],
-    "Steel slag": [0.854, 62.75, 9.9, 16.09],
-    "Glass powder": [0.233, 12.54, 1.16, 74.8],
-    "None": [0.0, 0.0, 0.0, 0.0]
-}
-
 # === Load the correct trained model ===
-with open('3DP_November_2025.pkl', 'rb') as f:
-    models = cloudpickle.load(f)
+models = load_models('3DP_November_2025.pkl')
+# Precomputed strength tables (python -m erdc precompute-surfaces); None if absent or stale
+surfaces = load_surfaces('3DP_November_2025.pkl')
 
 # Initialize session state for main prediction trigger
 if "predicted_main" not in st.session_state:
@@ -94,6 +94,40 @@ def sync_opt_scm_defaults():
     st.session_state["opt_al2o"] = default_vals[2]
     st.session_state["opt_sio2"] = default_vals[3]
 
+
+def show_job_panel(state_key, label, show_running, show_finished):
+    """Show the background job in ``st.session_state[state_key]`` (see erdc.jobs).
+
+    While it runs only this panel re-runs, once a second, calling
+    ``show_running(job, done, total, partials)``; a finished job goes to
+    ``show_finished(job)``, a cancelled or failed one gets a message.
+    """
+    job = st.session_state.get(state_key)
+    live_job = job if job is not None and job.running else None
+
+    def panel():
+        job = st.session_state.get(state_key)
+        if job is None:
+            return
+        status, done, total, partials = job.snapshot()
+        if job.running:
+            show_running(job, done, total, partials)
+            return
+        if live_job is job:
+            # Finished while auto-refreshing: rerun the app so the fragment stops polling
+            st.rerun()
+        if status == jobs.CANCELLED:
+            st.info(f"{label} cancelled after {job.elapsed:.1f} s.")
+        elif status == jobs.FAILED:
+            st.error(f"{label} failed: {job.error}")
+        else:
+            show_finished(job)
+
+    if live_job is not None and hasattr(st, "fragment"):
+        st.fragment(panel, run_every=1.0)()
+    else:
+        panel()
+
 # MST logo and ERDC logo
 col1, col2, col3 = st.columns([1, 4, 1])
 with col1:
@@ -104,7 +138,7 @@ with col3:
 # === Streamlit UI ===
 st.title("3DP Concrete Property Predictor")
 
-tab1, tab2 = st.tabs(["Prediction", "Optimization"])
+tab1, tab2, tab3 = st.tabs(["Prediction", "Optimization", "Sensitivity"])
 
 # ----------------------
 # Tab 1: Prediction
@@ -114,15 +148,6 @@ with tab1:
 
     user_input = {}
 
-    fiber_type_options = {
-        "None": 0,
-        "Steel": 1,
-        "PVA": 2,
-        "PP": 3,
-        "Glass": 4,
-        "Hemp": 5
-    }
-
     # === SCM Composition Section ===
     with st.expander("🧪 SCM Composition"):
         scm_choice = st.selectbox("Choose SCM Type:", list(scm_defaults.keys()))
@@ -168,75 +193,19 @@ with tab1:
     Al2O = user_input.pop('Al2O3 in SCM')
     SiO2 = user_input.pop('SiO2 in SCM')
 
-    total = CAO + Al2O + SiO2
-    norm_CAO = CAO / total if total != 0 else 0
-    norm_Al2O = Al2O / total if total != 0 else 0
-    reg = norm_Al2O - norm_CAO
-
-    if reg < (-2/3):
-        Nc = (11 + norm_Al2O - 10 * norm_CAO) / (3 - 2 * norm_CAO + 2 * norm_Al2O)
-    elif (-2/3) <= reg <= 0:
-        Nc = (11 + 10 * norm_Al2O - 10 * norm_CAO) / (3 - 2 * norm_CAO + 2 * norm_Al2O)
-    else:
-        Nc = (11 + 13 * norm_Al2O - 13 * norm_CAO) / (3 - 2 * norm_CAO + 2 * norm_Al2O)
-
-    user_input['Nc'] = Nc
+    user_input['Nc'] = compute_nc(CAO, Al2O, SiO2)
     user_input['CaO in SCM'] = CAO
     user_input['Al2O3 in SCM'] = Al2O
     user_input['SiO2 in SCM'] = SiO2
 
     # === Predictions ===
     # Rheology
-    rheology_df = pd.DataFrame([{feature: user_input[feature] for feature in rheology_features_list}])
-
-    water_retention = models['stacking_model_R1'].predict(rheology_df)[0]
-    dynamic_yield_stress = models['stacking_model_R2'].predict(rheology_df)[0]
-    plastic_viscosity = models['stacking_model_R3'].predict(rheology_df)[0]
-    static_floc_stress = models['stacking_model_R4'].predict(rheology_df)[0]
-    athix = models['stacking_model_R5'].predict(rheology_df)[0]
-
-    total_predictions = {
-        "Water Retention": water_retention,
-        "Dynamic Yield Stress (Pa)": dynamic_yield_stress,
-        "Plastic Viscosity (Pa·s)": plastic_viscosity,
-        "Static Flocculation Stress (Pa)": static_floc_stress,
-        "Athix (Pa/min)": athix
-    }
+    total_predictions = predict_rheology(models, user_input)
 
     # Compressive Strength (7 & 28 days)
-    age_predictions = {}
-    for age in [7, 28]:
-        user_input['Age'] = age
-        compressive_df = pd.DataFrame([{feature: user_input[feature] for feature in compressive_features_list}])
-        compressive_strength = models['stacking_model_C'].predict(compressive_df)[0]
-        age_predictions[age] = {"Compressive Strength (MPa)": compressive_strength}
-
-    # --- Ranges for PASS/FAIL logic ---
-    # Rheology thresholds (low, high) — choose set by fiber presence
-    RANGES_WITH_FIBER = {
-        "Water Retention": (None, 12),                # <= 12  (I-CAR)
-        "Dynamic Yield Stress (Pa)": (583, 1066),     # 583–1066 (I-CAR)
-        "Plastic Viscosity (Pa·s)": (2.5, 4.4),       # 2.5–4.4 (I-CAR)
-        "Static Flocculation Stress (Pa)": (200, 500), # 200–500 (I-CAR)
-        "Athix (Pa/min)": (8, 25),                    # 8–25  (I-CAR)
-    }
-    RANGES_NO_FIBER = {
-        "Water Retention": (None, 8),                 # <= 8   (I-CAR)
-        "Dynamic Yield Stress (Pa)": (422, 905),
-        "Plastic Viscosity (Pa·s)": (3.7, 8.8),
-        "Static Flocculation Stress (Pa)": (200, 1000),
-        "Athix (Pa/min)": (10, 80),
-    }
-
-    # Compressive strength thresholds (MPa) — choose set by fiber presence
-    # (Values taken from your latest message; adjust as needed)
-    COMPRESSIVE_WITH_FIBER = {
-        7: 10,
-        28: 25,
-    }
-    COMPRESSIVE_NO_FIBER = {
-        7: 10,
-        28: 30,
+    age_predictions = {
+        age: {"Compressive Strength (MPa)": value}
+        for age, value in predict_compressive(models, user_input, ages=AGES, surfaces=surfaces).items()
     }
 
     # === Predict button ===
@@ -247,7 +216,7 @@ with tab1:
 
         def check_pass_fail(name, value, fiber_type_num: int):
             """Return ('PASS'|'Fail', html_badge) based on fiber_type-specific ranges."""
-            ranges = RANGES_NO_FIBER if fiber_type_num == 0 else RANGES_WITH_FIBER
+            ranges = rheology_ranges(fiber_type_num)
             lo, hi = ranges.get(name, (None, None))  # default: no bounds → Fail unless within both
 
             status = "Fail"
@@ -267,7 +236,7 @@ with tab1:
 
         def check_strength_pass_fail(age: int, value: float, fiber_type_num: int):
             """Return PASS/Fail for compressive strength given fiber type."""
-            thresholds = COMPRESSIVE_NO_FIBER if fiber_type_num == 0 else COMPRESSIVE_WITH_FIBER
+            thresholds = compressive_thresholds(fiber_type_num)
             min_strength = thresholds.get(age, None)
 
             status = "Fail"
@@ -285,66 +254,208 @@ with tab1:
         st.subheader("Predicted Rheological Properties with Status")
         all_pass = True
         fiber_type_num = user_input.get('Fiber Type', 0)  # 0 if missing
-        for key, value in total_predictions.items():
-            status, display = check_pass_fail(key, value, fiber_type_num)
-            if status != "PASS":
-                all_pass = False
-            st.markdown(display, unsafe_allow_html=True)
-
-        # Check compressive strength at 7 and 28 days
-        st.markdown("##### Compressive Strength (MPa) with Pass/Fail")
-        for age, results in age_predictions.items():
-            for _, value in results.items():
-                status, display = check_strength_pass_fail(age, value, fiber_type_num)
+        with metrics.timed("render.badges"):
+            for key, value in total_predictions.items():
+                status, display = check_pass_fail(key, value, fiber_type_num)
                 if status != "PASS":
                     all_pass = False
                 st.markdown(display, unsafe_allow_html=True)
 
+        # Check compressive strength at 7 and 28 days
+        st.markdown("##### Compressive Strength (MPa) with Pass/Fail")
+        with metrics.timed("render.badges"):
+            for age, results in age_predictions.items():
+                for _, value in results.items():
+                    status, display = check_strength_pass_fail(age, value, fiber_type_num)
+                    if status != "PASS":
+                        all_pass = False
+                    st.markdown(display, unsafe_allow_html=True)
+
         # If not all passed, show a warning
         if not all_pass:
             st.warning("⚠️ The predicted results did not pass all quality checks. 3DP Layer and 3DP Strength predictions may not be accurate.")
 
+        # === Closest measured mixes (applicability domain) ===
+        with st.expander("🔎 Closest Measured Mixes"):
+            for sheet, title in (("df_C_S", "Compressive strength database (28 days)"), ("df_R", "Rheology database")):
+                index = neighbors[sheet]
+                distance = float(index.domain_distance(user_input, defaults={'Age': 28})[0])
+                st.markdown(f"**{title}** — domain distance {distance:.2f}")
+                if distance > 1:
+                    st.warning("Outside the measured data: this prediction is an extrapolation.")
+                st.dataframe(index.nearest(user_input, defaults={'Age': 28}), hide_index=True)
+
         # === 3DP Layer & Strength (optional section) ===
         if st.session_state["predicted_main"]:
             enable_3dp_layer = st.toggle("Enable 3DP Layer Prediction", key="layer_toggle")
+            printing_mode = "Predict"
             if enable_3dp_layer:
+                printing_mode = st.radio(
+                    "3DP mode:",
+                    ["Predict", "Optimize printing parameters"],
+                    horizontal=True,
+                    key="layer_mode",
+                    help="Optimize searches speed, nozzle size and layer height (optionally W/B and cement) "
+                         "for the most printable layers above a 28-day 3DP strength floor.",
+                )
+            if enable_3dp_layer and printing_mode == "Predict":
                 with st.expander("3DP Printing Parameters"):
                     printing_speed = st.number_input(f"{feature_labels['Printing speed (mm/s)']}:", value=0.0, step=0.01, format="%.2f", key="layer_speed")
                     nozzle_size = st.number_input(f"{feature_labels['nozzle size (mm)']}:", value=0.0, step=0.01, format="%.2f", key="layer_nozzle")
                     single_layer_thickness = st.number_input(f"{feature_labels['single layer height (mm)']}:", value=0.0, step=0.01, format="%.2f", key="layer_thickness")
 
                 if st.button("Predict 3DP Layers & Strength"):
-                    # Prepare input for layer model (align strictly to model features)
-                    expected_features = models["stacking_model_L"].feature_names_in_
-                    layer_input = {key: user_input[key] for key in expected_features if key in user_input}
-
-                    layer_input["Printing speed (mm/s)"] = printing_speed
-                    layer_input["nozzle size (mm)"] = nozzle_size
-                    layer_input["single layer height (mm)"] = single_layer_thickness
-
-                    layer_df = pd.DataFrame([layer_input])
-                    max_layers = models["stacking_model_L"].predict(layer_df)[0]
+                    # Inputs are aligned strictly to each model's feature_names_in_
+                    printing_input = {
+                        "Printing speed (mm/s)": printing_speed,
+                        "nozzle size (mm)": nozzle_size,
+                        "single layer height (mm)": single_layer_thickness,
+                    }
+
+                    max_layers = predict_layers(models, user_input, printing_input)
                     st.subheader("Predicted 3DP Maximum Printing Layers")
                     st.write(f"**Maximum Printing Layers:** {int(round(max_layers))}")
 
                     # 3DP Strength Prediction
-                    strength_predictions = {}
-                    expected_features_S = models["stacking_model_S"].feature_names_in_
-                    for age in [7, 28]:
-                        combined_input = user_input.copy()
-                        combined_input["Age"] = age
-                        combined_input["Printing speed (mm/s)"] = printing_speed
-                        combined_input["nozzle size (mm)"] = nozzle_size
-                        combined_input["single layer height (mm)"] = single_layer_thickness
-
-                        strength_input = {key: combined_input[key] for key in expected_features_S if key in combined_input}
-                        strength_df = pd.DataFrame([strength_input])
-                        strength_predictions[age] = models["stacking_model_S"].predict(strength_df)[0]
+                    strength_predictions = predict_printed_strength(models, user_input, printing_input, ages=AGES)
 
                     st.subheader("Predicted 3DP Compressive Strength")
                     for age, value in strength_predictions.items():
                         st.write(f"**{age} days Strength (MPa):** {value:.2f}")
 
+            elif enable_3dp_layer:
+                # === Printing-parameter optimizer (sliced batched predicts on a background job) ===
+                with st.expander("🖨️ Printing Parameter Search", expanded=True):
+                    step_columns = st.columns(3)
+                    printing_steps = {
+                        name: step_column.number_input(
+                            f"{feature_labels[name].split(' (')[0]} step:", value=PRINTING_STEPS[name],
+                            min_value=0.1, step=0.5, key=f"print_step_{name}",
+                        )
+                        for step_column, name in zip(step_columns, PRINTING_RANGES)
+                    }
+                    min_printed_strength = st.number_input(
+                        "Minimum 28-day 3DP strength (MPa):",
+                        value=float(compressive_thresholds(fiber_type_num)[28]), step=0.5, key="print_min_strength",
+                    )
+
+                    # Optionally search the mix jointly with the printing parameters
+                    printing_mix_space = {}
+                    if st.checkbox("Also search Water/Binder", key="print_search_wb"):
+                        wb_range = st.slider("Water/Binder range:", 0.20, 0.60, SEARCH_VARIABLES["Water/Binder"], step=0.01, key="print_wb_range")
+                        wb_step = st.number_input("W/B step:", value=0.02, min_value=0.005, step=0.005, format="%.3f", key="print_wb_step")
+                        printing_mix_space["Water/Binder"] = GridSpec(wb_min=wb_range[0], wb_max=wb_range[1], wb_step=wb_step).wb_values()
+                    if st.checkbox("Also search cement (% of K)", key="print_search_cement"):
+                        lo, hi = SEARCH_VARIABLES["Cement fraction"]
+                        cement_range = st.slider("Cement range (% of K):", 0.0, 100.0, (lo * 100, hi * 100), step=1.0, key="print_cement_range")
+                        cement_step = st.number_input("Cement step (% of K):", value=10.0, min_value=1.0, step=1.0, key="print_cement_step")
+                        printing_mix_space["Cement fraction"] = GridSpec(
+                            cement_min=cement_range[0] / 100, cement_max=cement_range[1] / 100, cement_step=cement_step / 100,
+                        ).cement_fractions()
+
+                    printing_candidates = None
+                    try:
+                        size = printing_grid_size(printing_steps, printing_mix_space)
+                    except ValueError as exc:
+                        st.error(f"Invalid search grid: {exc}")
+                    else:
+                        if size > PRINTING_MAX_CANDIDATES:
+                            st.error(f"{size:,} candidate combinations exceed the limit of {PRINTING_MAX_CANDIDATES:,}; use coarser steps.")
+                        else:
+                            printing_candidates = size
+                            st.caption(f"{size:,} candidate combinations")
+
+                if st.button("Optimize Printing Parameters", disabled=not printing_candidates):
+                    if st.session_state.get("print_job") is not None:
+                        st.session_state["print_job"].cancel()
+                    # Scored in slices on a background thread, keeping only the best candidates
+                    st.session_state["print_job"] = jobs.start(
+                        "printing", optimize_printing, models, dict(user_input), min_strength=min_printed_strength,
+                        steps=printing_steps, mix_space=printing_mix_space,
+                    )
+
+                def show_printing_result(job):
+                    printing_result = job.result
+                    st.caption(f"Scored {printing_result.candidates:,} combinations; "
+                               f"{printing_result.feasible:,} meet the strength floor.")
+                    if printing_result.ranked.empty:
+                        st.warning(f"No combination reaches {printing_result.min_strength:.1f} MPa of 28-day 3DP strength.")
+                    else:
+                        best = printing_result.ranked.iloc[0]
+                        st.success(
+                            f"Best: {int(round(best[LAYERS_COLUMN]))} layers at {best['Printing speed (mm/s)']:.1f} mm/s, "
+                            f"{best['nozzle size (mm)']:.1f} mm nozzle, {best['single layer height (mm)']:.1f} mm layers "
+                            f"({best[PRINTED_STRENGTH_COLUMN]:.1f} MPa)."
+                        )
+                        # Distances to the measured mixes, computed once per job
+                        cached = st.session_state.get("print_job_domain")
+                        if cached is None or cached[0] != job.id:
+                            top = printing_result.ranked.head(100)
+                            cached = (job.id, top.assign(**domain_columns(neighbors, top, ["df_3D_L", "df_3D_S"], defaults={'Age': 28})))
+                            st.session_state["print_job_domain"] = cached
+                        top = cached[1]
+                        shown = list(PRINTING_RANGES)
+                        if "Water/Binder" in printing_result.mix_axes:
+                            shown.append("Water/Binder")
+                        if "Cement fraction" in printing_result.mix_axes:
+                            shown += ["Cement content (%)", "SCM content (%)"]
+                        shown += [LAYERS_COLUMN, PRINTED_STRENGTH_COLUMN, "3DP layers domain distance",
+                                  "3DP strength domain distance", "Applicability domain"]
+                        st.dataframe(top[shown], hide_index=True)
+
+                    # Best feasible layers per speed × layer height, maximized over the other parameters
+                    heat = printing_result.heatmap
+                    st.altair_chart(
+                        alt.Chart(heat).mark_rect().encode(
+                            x=alt.X(field='Printing speed (mm/s)', type='ordinal'),
+                            y=alt.Y(field='single layer height (mm)', type='ordinal', sort='descending'),
+                            color=alt.Color(field=LAYERS_COLUMN, type='quantitative', scale=alt.Scale(scheme='viridis')),
+                            tooltip=[
+                                alt.Tooltip(field='Printing speed (mm/s)', type='quantitative'),
+                                alt.Tooltip(field='single layer height (mm)', type='quantitative'),
+                                alt.Tooltip(field=LAYERS_COLUMN, type='quantitative', format='.1f'),
+                            ],
+                        ),
+                    )
+
+                def show_print_progress(job, done, total, partials):
+                    st.progress(job.fraction, text=f"Scoring printing parameters… {done:,}/{total:,} ({job.elapsed:.1f} s)")
+                    if st.button("Cancel search", key="print_cancel"):
+                        job.cancel()
+                    if partials and len(partials[-1]):
+                        st.caption(f"Best so far: {int(round(partials[-1][LAYERS_COLUMN].iloc[0]))} layers")
+
+                show_job_panel("print_job", "Printing search", show_print_progress, show_printing_result)
+
+    # === Batch Prediction ===
+    with st.expander("📁 Batch Prediction (CSV / Excel)"):
+        st.caption(
+            "Upload one mix per row with the model-key columns above. 'Nc' may be replaced by the "
+            "'CaO in SCM', 'Al2O3 in SCM' and 'SiO2 in SCM' columns; add the three printing-parameter "
+            "columns to also predict 3DP layers and strength."
+        )
+        batch_file = st.file_uploader("Mix table:", type=["csv", "xlsx"], key="batch_file")
+        if batch_file is not None and st.button("Run Batch Prediction"):
+            out_path = os.path.join(tempfile.gettempdir(), f"erdc-batch-{uuid.uuid4().hex}.csv")
+            progress_text = st.empty()
+            try:
+                n_rows = run_batch(models, batch_file, batch_file.name, out_path, neighbors=neighbors,
+                                   progress=lambda n: progress_text.write(f"Scored {n:,} mixes…"))
+            except ValueError as exc:
+                st.error(f"Could not score the uploaded file: {exc}")
+            else:
+                previous = st.session_state.get("batch_result")
+                if previous and os.path.exists(previous[0]):
+                    os.remove(previous[0])
+                st.session_state["batch_result"] = (out_path, batch_file.name, n_rows)
+
+        if st.session_state.get("batch_result"):
+            out_path, source_name, n_rows = st.session_state["batch_result"]
+            if os.path.exists(out_path):
+                st.success(f"Scored {n_rows:,} mixes from {source_name}.")
+                with open(out_path, "rb") as f:
+                    st.download_button("Download results (CSV)", f, file_name=f"{os.path.splitext(source_name)[0]}-predictions.csv", mime="text/csv")
+
 # ----------------------
 # Tab 2: Optimization
 # ----------------------
@@ -407,61 +518,291 @@ with tab2:
     # === Target Strength Input ===
     target_strength = st.number_input("Target Compressive Strength (MPa, 20–60):", value=50.0, step=0.1, key="opt_target_strength")
 
+    opt_mode = st.radio(
+        "Optimization mode:",
+        ["Target strength", "Multi-objective (Pareto)"],
+        horizontal=True,
+        key="opt_mode",
+        help="Multi-objective also enforces the rheology and 7/28-day pass/fail limits and "
+             "returns the 28-day strength vs. cement content Pareto front.",
+    )
+
+    # === Search Grid Resolution ===
+    grid_spec = None
+    interpolate_surfaces = False
+    search_space = {}
+    if opt_mode == "Multi-objective (Pareto)":
+        with st.expander("📊 Rheology Input"):
+            opt_user_input['Mini-slump after joint'] = st.number_input(f"{feature_labels['Mini-slump after joint']}:", value=0.0, step=0.01, format="%.2f", key="opt_mini_slump")
+
+        with st.expander("📐 Search Space"):
+            lo, hi = SEARCH_VARIABLES["Cement fraction"]
+            cement_range = st.slider("Cement (% of K):", 0.0, 100.0, (lo * 100, hi * 100), step=1.0, key="opt_space_cement")
+            search_space["Cement fraction"] = (cement_range[0] / 100, cement_range[1] / 100)
+            search_space["Water/Binder"] = st.slider("Water/Binder:", 0.20, 0.60, SEARCH_VARIABLES["Water/Binder"], step=0.01, key="opt_space_wb")
+
+            st.caption("Optionally search these too (overrides the fixed Mix Design value):")
+            for name in ("Limestone content (%)", "Silica fume content (%)", "Sand/Binder"):
+                if st.checkbox(f"Search {name}", key=f"opt_space_use_{name}"):
+                    lo, hi = SEARCH_VARIABLES[name]
+                    search_space[name] = st.slider(f"{name} range:", lo, hi, (lo, hi), key=f"opt_space_{name}")
+            refine_levels = st.number_input("Refinement levels:", value=4, min_value=0, max_value=8, step=1, key="opt_refine_levels")
+    else:
+        with st.expander("📐 Search Grid"):
+            default_grid = GridSpec()
+            g1, g2, g3 = st.columns(3)
+            wb_min = g1.number_input("W/B min:", value=default_grid.wb_min, min_value=0.0, max_value=1.0, step=0.01, format="%.3f", key="opt_wb_min")
+            wb_max = g2.number_input("W/B max:", value=default_grid.wb_max, min_value=0.0, max_value=1.0, step=0.01, format="%.3f", key="opt_wb_max")
+            wb_step = g3.number_input("W/B step:", value=default_grid.wb_step, min_value=0.0005, step=0.001, format="%.4f", key="opt_wb_step")
+            c1, c2, c3 = st.columns(3)
+            cement_min = c1.number_input("Cement min (% of K):", value=default_grid.cement_min * 100, min_value=0.0, max_value=100.0, step=1.0, key="opt_cement_min")
+            cement_max = c2.number_input("Cement max (% of K):", value=default_grid.cement_max * 100, min_value=0.0, max_value=100.0, step=1.0, key="opt_cement_max")
+            cement_step = c3.number_input("Cement step (% of K):", value=default_grid.cement_step * 100, min_value=0.01, step=0.5, key="opt_cement_step")
+
+            try:
+                grid_spec = GridSpec(wb_min, wb_max, wb_step, cement_min / 100, cement_max / 100, cement_step / 100)
+                if grid_spec.size > STRENGTH_MAX_CANDIDATES:
+                    st.error(f"{grid_spec.size:,} candidate mixes exceed the limit of {STRENGTH_MAX_CANDIDATES:,}; use coarser steps.")
+                    grid_spec = None
+                else:
+                    st.caption(f"{grid_spec.size:,} candidate mixes")
+            except ValueError as exc:
+                st.error(f"Invalid search grid: {exc}")
+
+            if surfaces is not None:
+                interpolate_surfaces = st.checkbox(
+                    "Interpolate precomputed surfaces between nodes",
+                    key="opt_interpolate",
+                    help="Mixes on the precomputed nodes are always looked up. Interpolated strengths "
+                         "are approximate and can differ from the model by a few MPa.",
+                )
+
     # === Compute Nc ===
     CAO = opt_user_input.pop('CaO in SCM')
     Al2O = opt_user_input.pop('Al2O3 in SCM')
     SiO2 = opt_user_input.pop('SiO2 in SCM')
 
-    total = CAO + Al2O + SiO2
-    norm_CAO = CAO / total if total != 0 else 0
-    norm_Al2O = Al2O / total if total != 0 else 0
-    reg = norm_Al2O - norm_CAO
-
-    if reg < (-2/3):
-        Nc = (11 + norm_Al2O - 10 * norm_CAO) / (3 - 2 * norm_CAO + 2 * norm_Al2O)
-    elif (-2/3) <= reg <= 0:
-        Nc = (11 + 10 * norm_Al2O - 10 * norm_CAO) / (3 - 2 * norm_CAO + 2 * norm_Al2O)
-    else:
-        Nc = (11 + 13 * norm_Al2O - 13 * norm_CAO) / (3 - 2 * norm_CAO + 2 * norm_Al2O)
-
-    opt_user_input['Nc'] = Nc
+    opt_user_input['Nc'] = compute_nc(CAO, Al2O, SiO2)
     opt_user_input['CaO in SCM'] = CAO
     opt_user_input['Al2O3 in SCM'] = Al2O
     opt_user_input['SiO2 in SCM'] = SiO2
 
     # === Optimization Button & Logic ===
-    results_list = []
-
-    if st.button("Start Optimization"):
-        limestone = opt_user_input['Limestone content (%)']
-        silica_fume = opt_user_input['Silica fume content (%)']
-        K = 100 - limestone - silica_fume
-
-        for wb in np.arange(0.30, 0.51, 0.01):
-            for cement_pct in np.arange(0.5, 1.01, 0.05):  # 50% to 100%
-                cement = cement_pct * K
-                scm = K - cement
-
-                current_input = opt_user_input.copy()
-                current_input['Cement content (%)'] = cement
-                current_input['SCM content (%)'] = scm
-                current_input['Water/Binder'] = wb
-                current_input['Age'] = 28
-
-                df_input = pd.DataFrame([{feature: current_input[feature] for feature in compressive_features_list}])
-                predicted_strength = models['stacking_model_C'].predict(df_input)[0]
-
-                if predicted_strength >= target_strength:
-                    results_list.append({
-                        "Cement content (%)": cement,
-                        "SCM content (%)": int(scm),
-                        "Water/Binder": wb,
-                        "Predicted Strength (MPa)": predicted_strength
-                    })
-
-        if results_list:
-            st.success(f"Found {len(results_list)} valid combinations!")
-            df_results = pd.DataFrame(results_list)
-            st.dataframe(df_results)
+    # Searches run as background jobs; the job lives in session state so
+    # progress, partial results and finished results survive reruns.
+    if opt_mode == "Multi-objective (Pareto)":
+        if st.button("Start Optimization"):
+            if st.session_state.get("opt_job") is not None:
+                st.session_state["opt_job"].cancel()
+            st.session_state["opt_job"] = jobs.start(
+                "pareto", optimize_pareto, models, dict(opt_user_input), search_space,
+                min_strength=target_strength, levels=int(refine_levels),
+            )
+            front_columns = list(search_space) + ['Cement content (%)', 'SCM content (%)'] + list(STRENGTH_COLUMNS.values())
+            front_columns += list(rheology_models)
+            front_columns += ["Rheology domain distance", "Compressive strength domain distance", "Applicability domain"]
+            st.session_state["opt_job_columns"] = list(dict.fromkeys(front_columns))
+            st.session_state["opt_job_base"] = dict(opt_user_input)
+
+    elif st.button("Start Optimization", disabled=grid_spec is None):
+        if st.session_state.get("opt_job") is not None:
+            st.session_state["opt_job"].cancel()
+        # Whole grid scored with batched predicts instead of one call per mix
+        st.session_state["opt_job_base"] = dict(opt_user_input)
+        st.session_state["opt_job"] = jobs.start(
+            "strength", optimize_strength, models['stacking_model_C'], dict(opt_user_input), target_strength, grid_spec,
+            surfaces=surfaces, interpolate=interpolate_surfaces,
+        )
+
+    def show_pareto_front(front):
+        st.dataframe(front[[c for c in st.session_state["opt_job_columns"] if c in front.columns]])
+        st.scatter_chart(front, x='Cement content (%)', y=STRENGTH_COLUMNS[28])
+
+    def with_domain(job):
+        """Finished results plus their distance to the measured mixes, computed once per job."""
+        cached = st.session_state.get("opt_job_domain")
+        if cached is None or cached[0] != job.id:
+            base = {**st.session_state["opt_job_base"], 'Age': 28}
+            if job.kind == "pareto":
+                results = job.result.front
+                columns = domain_columns(neighbors, results, ["df_R", "df_C_S"], defaults=base)
+            else:
+                results = job.result
+                K = 100 - base['Limestone content (%)'] - base['Silica fume content (%)']
+                # The SCM column is rounded for display; query with the exact remainder of K
+                query = results.assign(**{'SCM content (%)': K - results['Cement content (%)']})
+                columns = domain_columns(neighbors, query, ["df_C_S"], defaults=base)
+            cached = (job.id, results.assign(**columns))
+            st.session_state["opt_job_domain"] = cached
+        results = cached[1]
+        st.caption(f"{(results['Applicability domain'] == 'In domain').sum():,} of {len(results):,} "
+                   "mixes lie within the measured data (domain distance ≤ 1).")
+        return results
+
+    def show_opt_progress(job, done, total, partials):
+        st.progress(job.fraction, text=f"Scoring candidates… {done:,}/{total:,} ({job.elapsed:.1f} s)"
+                    if job.kind == "strength" else
+                    f"Refinement level {done}/{total} ({job.elapsed:.1f} s)")
+        if st.button("Cancel optimization", key="opt_cancel"):
+            job.cancel()
+        if job.kind == "strength" and partials:
+            found = pd.concat(partials, ignore_index=True)
+            st.caption(f"{len(found):,} valid combinations so far")
+            st.dataframe(found)
+        elif job.kind == "pareto" and partials and len(partials[-1]):
+            st.caption(f"Current front: {len(partials[-1])} mixes")
+            show_pareto_front(partials[-1])
+
+    def show_opt_result(job):
+        if job.kind == "pareto":
+            pareto = job.result
+            st.caption(f"Scored {sum(pareto.levels):,} candidate mixes over {len(pareto.levels)} refinement levels.")
+            if not pareto.front.empty:
+                st.success(f"Found {len(pareto.front)} Pareto-optimal mixes passing all checks!")
+                show_pareto_front(with_domain(job))
+            else:
+                st.warning("No combination passed all rheology and strength checks.")
         else:
-            st.warning("No combination met the target strength.")
+            df_results = job.result
+            if not df_results.empty:
+                st.success(f"Found {len(df_results)} valid combinations!")
+                st.dataframe(with_domain(job))
+            else:
+                st.warning("No combination met the target strength.")
+
+    show_job_panel("opt_job", "Optimization", show_opt_progress, show_opt_result)
+
+# ----------------------
+# Tab 3: Sensitivity
+# ----------------------
+with tab3:
+    st.subheader("Two-Input Sensitivity Explorer")
+    st.caption("Every input not on an axis is held at the mix entered on the Prediction tab.")
+
+    sens_target = st.selectbox("Target property:", list(SENSITIVITY_TARGETS), key="sens_target")
+    sens_inputs = sweepable_inputs(models, sens_target)
+    a1, a2 = st.columns(2)
+    sens_x = a1.selectbox("X axis:", sens_inputs, index=sens_inputs.index('Water/Binder'), key="sens_x",
+                          format_func=lambda f: feature_labels.get(f, f))
+    y_choices = [f for f in sens_inputs if f != sens_x]
+    sens_y = a2.selectbox("Y axis:", y_choices, index=y_choices.index('SCM content (%)') if 'SCM content (%)' in y_choices else 0,
+                          key="sens_y", format_func=lambda f: feature_labels.get(f, f))
+
+    sens_values = {}
+    with st.expander("📐 Sweep Ranges", expanded=True):
+        sens_points = st.slider("Grid points per axis:", 10, 100, 40, key="sens_points")
+        for axis_input in (sens_x, sens_y):
+            lo, hi = INPUT_RANGES[axis_input]
+            if axis_input in DISCRETE_INPUTS:
+                st.caption(f"{feature_labels.get(axis_input, axis_input)}: every code from {lo} to {hi}")
+                sens_values[axis_input] = axis_values(axis_input, lo, hi, 0)
+            else:
+                low, high = st.slider(f"{feature_labels.get(axis_input, axis_input)} range:", lo, hi, (lo, hi), key=f"sens_range_{axis_input}")
+                if high > low:
+                    sens_values[axis_input] = axis_values(axis_input, low, high, sens_points)
+                else:
+                    st.error("Pick a range wider than a single value.")
+
+    sens_mix = dict(user_input)
+    sens_age = 28
+    sens_features = target_features(models, sens_target)
+    if 'Age' in sens_features:
+        sens_age = st.radio("Age (days):", list(AGES), index=AGES.index(28), horizontal=True, key="sens_age")
+    printing_inputs = [f for f in PRINTING_RANGES if f in sens_features and f not in (sens_x, sens_y)]
+    if printing_inputs:
+        with st.expander("3DP Printing Parameters"):
+            for name in printing_inputs:
+                lo, hi = PRINTING_RANGES[name]
+                sens_mix[name] = st.number_input(f"{feature_labels[name]}:", value=(lo + hi) / 2, step=0.5, key=f"sens_{name}")
+
+    if st.button("Explore", disabled=len(sens_values) < 2):
+        try:
+            st.session_state["sens_result"] = sweep(
+                models, sens_mix, sens_target, sens_x, sens_y, sens_values[sens_x], sens_values[sens_y], age=sens_age,
+            )
+        except ValueError as exc:
+            st.error(f"Could not run the sweep: {exc}")
+
+    sens_result = st.session_state.get("sens_result")
+    if sens_result is not None:
+        grid = sens_result.grid.copy()
+        # Rounded so the ordinal axes stay readable
+        grid[[sens_result.x, sens_result.y]] = grid[[sens_result.x, sens_result.y]].round(4)
+        tooltip = [alt.Tooltip(field=c, type='quantitative', format='.4~g') for c in (sens_result.x, sens_result.y, sens_result.target)]
+        heat = alt.Chart(grid).mark_rect().encode(
+            x=alt.X(field=sens_result.x, type='ordinal', axis=alt.Axis(labelOverlap=True)),
+            y=alt.Y(field=sens_result.y, type='ordinal', sort='descending', axis=alt.Axis(labelOverlap=True)),
+            color=alt.Color(field=sens_result.target, type='quantitative', scale=alt.Scale(scheme='viridis')),
+            tooltip=tooltip + ([alt.Tooltip(field="Status", type='nominal')] if "Status" in grid else []),
+        )
+        if "Status" in grid:
+            # Fail cells are washed out so the passing region stands out
+            fail = alt.Chart(grid).transform_filter(alt.datum.Status == "Fail").mark_rect(color="white", opacity=0.6).encode(
+                x=alt.X(field=sens_result.x, type='ordinal'),
+                y=alt.Y(field=sens_result.y, type='ordinal', sort='descending'),
+                tooltip=tooltip + [alt.Tooltip(field="Status", type='nominal')],
+            )
+            heat = heat + fail
+            passed = (grid["Status"] == "PASS").mean()
+            st.caption(f"{sens_result.target}: {passed:.0%} of the grid passes; failing cells are shaded.")
+        else:
+            st.caption(f"{sens_result.target}: no pass/fail limits are defined for this property.")
+        st.altair_chart(heat)
+
+# Shared prediction cache counters (all sessions in this process)
+cache_stats = prediction_cache.stats()
+st.sidebar.caption(
+    f"Prediction cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses "
+    f"({cache_stats['size']:,}/{cache_stats['maxsize']:,} entries)"
+)
+
+# === Performance panel (process-wide timings; collection is off unless enabled) ===
+with st.sidebar:
+    # The toggle only shows the panel; collection is process-wide and is switched
+    # by the buttons below (or ERDC_METRICS=1), never by another session's widget state
+    show_perf = st.toggle(
+        "Performance panel",
+        key="perf_panel",
+        help="Per-stage timings for every session in this server process. While collecting, "
+             "they are also logged to stderr as JSON once a minute.",
+    )
+
+    if show_perf:
+        if metrics.enabled():
+            st.caption("Collecting timings for every session in this process.")
+            st.button("Stop collecting", key="perf_stop", on_click=metrics.enable, args=(False,))
+        else:
+            st.caption("Timing collection is off for this process.")
+            st.button("Start collecting", key="perf_start", on_click=metrics.enable, args=(True,))
+        stage_stats = metrics.snapshot()
+        if stage_stats:
+            st.dataframe(
+                [
+                    {
+                        "Stage": stage,
+                        "Calls": stat["calls"],
+                        "Total (ms)": round(stat["seconds"] * 1e3, 2),
+                        "Mean (ms)": round(stat["seconds"] * 1e3 / stat["calls"], 3),
+                        "Max (ms)": round(stat["max_seconds"] * 1e3, 2),
+                    }
+                    for stage, stat in stage_stats.items()
+                ],
+                hide_index=True,
+            )
+        else:
+            st.caption("No timings recorded yet.")
+        st.download_button(
+            "Prometheus metrics",
+            metrics.prometheus_text({
+                "erdc_prediction_cache_hits": cache_stats["hits"],
+                "erdc_prediction_cache_misses": cache_stats["misses"],
+            }),
+            file_name="erdc-metrics.txt",
+            mime="text/plain",
+        )
+        if st.button("Reset timings"):
+            metrics.reset()
+
+metrics.record("streamlit.rerun", time.perf_counter() - rerun_started)
+# Nothing scrapes a Streamlit process: while collecting, log the counters once a minute
+metrics.log_snapshot_every()
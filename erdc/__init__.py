@@ -0,0 +1 @@
+"""Prediction and optimization helpers behind the 3DP Concrete Property Predictor UI."""
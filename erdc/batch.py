@@ -0,0 +1,232 @@
+"""Bulk scoring of uploaded mix tables.
+
+Input rows are read, scored and written one chunk at a time, so memory use
+depends on ``chunk_size`` rather than on the size of the file.
+
+Required columns are the model keys of ``rheology_features_list`` (without
+``Age``).  ``Nc`` may be omitted when ``CaO in SCM``, ``Al2O3 in SCM`` and
+``SiO2 in SCM`` are given; ``Fiber Type`` may be a code or a name from
+``fiber_type_options``.  Rows are numbered from 1 in error messages.  When the three printing-parameter columns are present
+the 3DP layer and 3DP strength models are run as well, for the rows that fill
+all three (the others get empty 3DP columns).  Given the database
+indexes (``erdc.resources.load_neighbors``), every row also gets its distance
+to the measured mixes (see ``erdc.neighbors``).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .inference import predict_many
+from .mix import (
+    AGES, PRINTING_FEATURES, compressive_features_list, compute_nc, extra_features, fiber_type_options,
+    rheology_features_list, rheology_models, rheology_pass, strength_pass,
+)
+
+DEFAULT_CHUNK_SIZE = 5_000
+REQUIRED_FEATURES = [f for f in dict.fromkeys(rheology_features_list + compressive_features_list) if f not in ('Nc', 'Age')]
+
+
+def _status(passed):
+    return np.where(passed, "PASS", "Fail")
+
+
+def iter_input_chunks(source, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV or XLSX file or buffer.
+
+    Chunks are indexed by data row number (from 1).  Only empty cells are
+    missing: text such as ``None`` or ``NA`` is kept as written.
+    """
+    if str(filename).lower().endswith(('.xlsx', '.xlsm')):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else "" for c in next(rows, ())]
+            block, start = [], 1
+            for row in rows:
+                if all(v is None for v in row):
+                    continue
+                block.append(row)
+                if len(block) == chunk_size:
+                    yield pd.DataFrame(block, columns=header, index=range(start, start + len(block)))
+                    block, start = [], start + len(block)
+            if block:
+                yield pd.DataFrame(block, columns=header, index=range(start, start + len(block)))
+        finally:
+            workbook.close()
+    else:
+        # The default NA strings would turn the fiber name "None" into a missing value
+        for chunk in pd.read_csv(source, chunksize=chunk_size, keep_default_na=False, na_values=[""]):
+            chunk.columns = [str(c).strip() for c in chunk.columns]
+            chunk.index += 1
+            yield chunk
+
+
+def _first(mask):
+    """Position of the first True in boolean Series ``mask``."""
+    return int(np.flatnonzero(mask.to_numpy())[0])
+
+
+def _numeric(values, column):
+    """``values`` as floats; blank text is missing, anything else unparsable raises ``ValueError``."""
+    values = values.map(lambda v: (v.strip() or np.nan) if isinstance(v, str) else v)
+    numeric = pd.to_numeric(values, errors='coerce')
+    bad = numeric.isna() & values.notna()
+    if bad.any():
+        i = _first(bad)
+        raise ValueError(f"row {values.index[i]}, column '{column}': {values.iloc[i]!r} is not a number")
+    return numeric
+
+
+def _fiber_codes(values):
+    """Map fiber names in ``values`` to their codes and check every code is known."""
+    names = values.map(lambda v: v.strip() if isinstance(v, str) else v)
+    codes = pd.to_numeric(names.map(lambda v: fiber_type_options.get(v, v) if isinstance(v, str) else v),
+                          errors='coerce')
+    unknown = ~codes.isin(list(fiber_type_options.values())) & names.notna() & (names != "")
+    if unknown.any():
+        i = _first(unknown)
+        known = ", ".join(f"{name} ({code})" for name, code in fiber_type_options.items())
+        raise ValueError(f"row {values.index[i]}, column 'Fiber Type': unknown fiber type {values.iloc[i]!r}; "
+                         f"expected one of {known}")
+    return codes
+
+
+def prepare_mixes(chunk):
+    """Return ``chunk`` with numeric model keys, Nc filled in from the oxides if needed.
+
+    Raises ``ValueError`` naming the row and column of the first unknown fiber
+    name, unparsable number or blank required input.
+    """
+    mixes = chunk.copy()
+    missing = [c for c in REQUIRED_FEATURES if c not in mixes]
+    if missing:
+        raise ValueError(f"missing input columns: {', '.join(missing)}")
+    mixes['Fiber Type'] = _fiber_codes(mixes['Fiber Type'])
+    for column in [c for c in REQUIRED_FEATURES if c != 'Fiber Type'] + [c for c in PRINTING_FEATURES if c in mixes]:
+        mixes[column] = _numeric(mixes[column], column)
+
+    if 'Nc' in mixes:
+        mixes['Nc'] = _numeric(mixes['Nc'], 'Nc')
+    if 'Nc' not in mixes or mixes['Nc'].isna().any():
+        missing_oxides = [c for c in extra_features if c not in mixes]
+        if missing_oxides:
+            raise ValueError(f"'Nc' is missing and cannot be computed without: {', '.join(missing_oxides)}")
+        oxides = pd.DataFrame({c: _numeric(mixes[c], c) for c in extra_features}).fillna(0.0)
+        nc = compute_nc(oxides[extra_features[0]], oxides[extra_features[1]], oxides[extra_features[2]])
+        mixes['Nc'] = mixes['Nc'].fillna(pd.Series(nc, index=mixes.index)) if 'Nc' in mixes else nc
+
+    blank = mixes[REQUIRED_FEATURES].isna()
+    if blank.to_numpy().any():
+        i = _first(blank.any(axis=1))
+        column = blank.columns[np.flatnonzero(blank.iloc[i].to_numpy())[0]]
+        raise ValueError(f"row {mixes.index[i]}, column '{column}': a value is required")
+    return mixes
+
+
+def score_mixes(models, mixes, include_3dp=None, neighbors=None):
+    """Predict every property for prepared ``mixes`` and append the PASS/Fail columns.
+
+    ``include_3dp`` defaults to whether the printing-parameter columns exist;
+    the 3DP models only score rows with all three filled in.  With
+    ``neighbors`` the applicability-domain columns are appended too.
+    """
+    if include_3dp is None:
+        include_3dp = all(c in mixes for c in PRINTING_FEATURES)
+    elif include_3dp:
+        missing = [c for c in PRINTING_FEATURES if c not in mixes]
+        if missing:
+            raise ValueError(f"missing printing-parameter columns: {', '.join(missing)}")
+    printed = mixes[PRINTING_FEATURES].notna().all(axis=1).to_numpy() if include_3dp else None
+
+    # Every (model, input) pair is independent: score them together so large
+    # chunks spread over the worker pool
+    rheology_df = mixes[rheology_features_list]
+    jobs = {name: (models[key], rheology_df) for name, key in rheology_models.items()}
+    for age in AGES:
+        jobs[f"Compressive Strength {age}d (MPa)"] = (
+            models['stacking_model_C'], mixes.assign(Age=age)[compressive_features_list]
+        )
+    if include_3dp and printed.any():
+        printable = mixes[printed]
+        layer_features = list(models["stacking_model_L"].feature_names_in_)
+        jobs["Maximum Printing Layers"] = (models["stacking_model_L"], printable[layer_features])
+        strength_features = list(models["stacking_model_S"].feature_names_in_)
+        for age in AGES:
+            jobs[f"3DP Strength {age}d (MPa)"] = (models["stacking_model_S"], printable.assign(Age=age)[strength_features])
+    predictions = dict(zip(jobs, predict_many(list(jobs.values()), names=list(jobs))))
+
+    result = mixes.copy()
+    fiber = mixes['Fiber Type'].to_numpy()
+    all_pass = np.ones(len(mixes), dtype=bool)
+    for name in rheology_models:
+        passed = rheology_pass(name, predictions[name], fiber)
+        result[name] = predictions[name]
+        result[f"{name} status"] = _status(passed)
+        all_pass &= passed
+
+    for age in AGES:
+        column = f"Compressive Strength {age}d (MPa)"
+        passed = strength_pass(age, predictions[column], fiber)
+        result[column] = predictions[column]
+        result[f"Compressive Strength {age}d status"] = _status(passed)
+        all_pass &= passed
+
+    result["All checks"] = _status(all_pass)
+
+    if include_3dp:
+        # Same columns for every chunk; rows without printing parameters stay empty
+        for column in ["Maximum Printing Layers"] + [f"3DP Strength {age}d (MPa)" for age in AGES]:
+            values = np.full(len(mixes), np.nan)
+            if column in predictions:
+                values[printed] = predictions[column]
+            result[column] = values
+
+    if neighbors is not None:
+        from .neighbors import domain_columns
+
+        columns = domain_columns(neighbors, mixes, ["df_R", "df_C_S"], defaults={'Age': 28})
+        if include_3dp:
+            inside = columns.pop("Applicability domain") == "In domain"
+            printed_columns = domain_columns(neighbors, mixes[printed], ["df_3D_L", "df_3D_S"], defaults={'Age': 28})
+            inside[printed] &= printed_columns.pop("Applicability domain") == "In domain"
+            for column, values in printed_columns.items():
+                columns[column] = np.full(len(mixes), np.nan)
+                columns[column][printed] = values
+            columns["Applicability domain"] = np.where(inside, "In domain", "Extrapolation")
+        for column, values in columns.items():
+            result[column] = values
+    return result
+
+
+def run_batch(models, source, filename, out_path, chunk_size=DEFAULT_CHUNK_SIZE, include_3dp=None, progress=None,
+              neighbors=None):
+    """Score ``source`` chunk by chunk, appending the results to CSV ``out_path``.
+
+    The output columns are fixed by the first chunk's header (3DP columns when
+    it has the printing parameters), so every chunk matches the CSV header.
+    ``progress`` is called with the running row count after each chunk.
+    Returns the number of rows written.
+    """
+    rows = 0
+    tmp_path = f"{out_path}.part"
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as out:
+            for chunk in iter_input_chunks(source, filename, chunk_size):
+                if include_3dp is None:
+                    include_3dp = all(c in chunk.columns for c in PRINTING_FEATURES)
+                with metrics.timed("batch.chunk"):
+                    scored = score_mixes(models, prepare_mixes(chunk), include_3dp, neighbors)
+                    scored.to_csv(out, header=rows == 0, index=False)
+                rows += len(scored)
+                if progress is not None:
+                    progress(rows)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
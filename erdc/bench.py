@@ -0,0 +1,273 @@
+"""Reproducible benchmarks for cold start, interactive latency and search throughput.
+
+    python -m erdc bench                       # compare against benchmarks/baseline.json
+    python -m erdc bench --save-baseline       # record a new baseline
+    python -m erdc bench --synthetic --quick   # offline, stand-in models, smaller sizes
+
+Without the real ``3DP_November_2025.pkl`` (or with ``--synthetic``) a stand-in
+artifact with the same keys and ``feature_names_in_`` is built from the
+workbook (``erdc.synthetic``), so the suite runs offline.  Baselines record
+which artifact and mode they were measured with, and a run is only compared
+with a baseline taken the same way.
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from . import engine, resources
+from .cache import prediction_cache
+from .cli import BASELINE_FILE, REGRESSION_TOLERANCE
+from .mix import rheology_features_list
+
+LOWER, HIGHER = "lower", "higher"
+
+
+class Report:
+    """Collected metrics: name -> (value, unit, which direction is better)."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better=LOWER):
+        self.metrics[name] = {"value": float(value), "unit": unit, "better": better}
+
+    def as_dict(self, meta):
+        return {"meta": meta, "metrics": self.metrics}
+
+
+def _median_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _reference_mix(database):
+    """First fully specified mix of the rheology sheet, as engine input."""
+    row = database["df_R"].dropna().iloc[0]
+    mix = {f: float(row[f]) for f in rheology_features_list}
+    mix.update({
+        'Printing speed (mm/s)': 30.0,
+        'nozzle size (mm)': 30.0,
+        'single layer height (mm)': 15.0,
+    })
+    return mix
+
+
+def _batch_frame(database, rows):
+    rng = np.random.default_rng(0)
+    base = database["df_R"][rheology_features_list].dropna()
+    frame = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    frame['Printing speed (mm/s)'] = rng.uniform(20, 50, rows)
+    frame['nozzle size (mm)'] = rng.uniform(20, 40, rows)
+    frame['single layer height (mm)'] = rng.uniform(10, 25, rows)
+    return frame
+
+
+def bench_cold_start(report, workbook, models_path, workdir, repeat):
+    import cloudpickle
+    import pandas as pd
+
+    from .model_store import ModelStore, convert
+
+    copy = os.path.join(workdir, os.path.basename(workbook))
+    shutil.copy2(workbook, copy)
+
+    def parse_workbook():
+        pd.read_excel(copy, sheet_name=list(resources.DATABASE_SHEETS.values()), engine='openpyxl')
+
+    def cached_workbook():
+        resources.clear()
+        resources.load_database(copy)
+
+    report.add("workbook_openpyxl_s", _median_time(parse_workbook, repeat), "s")
+    resources.clear()
+    resources.load_database(copy)   # writes the Parquet mirror
+    report.add("workbook_cached_s", _median_time(cached_workbook, repeat), "s")
+
+    def unpickle():
+        with open(models_path, 'rb') as f:
+            cloudpickle.load(f)
+
+    report.add("models_unpickle_s", _median_time(unpickle, repeat), "s")
+
+    store = convert(models_path, os.path.join(workdir, "models.models"))
+    report.add("model_store_open_s", _median_time(lambda: ModelStore(store), repeat), "s")
+    report.add("model_store_load_all_s", _median_time(lambda: ModelStore(store).preload(), repeat), "s")
+
+
+def bench_single_row(report, models, mix, repeat):
+    """One Prediction-tab evaluation: 5 rheology + 2 compressive predicts."""
+    previous = engine.FAST_PATH
+    for label, fast in (("dataframe", False), ("fastpath", True)):
+        engine.FAST_PATH = fast
+        try:
+            engine.predict(models, mix)   # warm-up (compiles the fast path)
+            samples = []
+            for _ in range(repeat):
+                prediction_cache.clear()
+                start = time.perf_counter()
+                engine.predict(models, mix)
+                samples.append((time.perf_counter() - start) * 1e3)
+        finally:
+            engine.FAST_PATH = previous
+        for q in (50, 90, 99):
+            report.add(f"single_row_{label}_p{q}_ms", np.percentile(samples, q), "ms")
+
+    prediction_cache.clear()
+    engine.predict(models, mix)
+    cached = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.predict(models, mix)
+        cached.append((time.perf_counter() - start) * 1e3)
+    report.add("single_row_cached_p50_ms", np.percentile(cached, 50), "ms")
+
+
+def bench_batch(report, models, database, sizes, repeat):
+    for rows in sizes:
+        frame = _batch_frame(database, rows)
+        elapsed = _median_time(lambda: engine.predict_batch(models, frame), repeat)
+        report.add(f"batch_{rows}_rows_per_s", rows / elapsed, "rows/s", HIGHER)
+
+
+def bench_optimization(report, models, mix, grid_sizes, repeat):
+    from .optimize import GridSpec, optimize_pareto, optimize_strength
+
+    base = engine.prepare_mix(mix)
+    for points in grid_sizes:
+        # Square-ish grid over the default ranges with about `points` candidates
+        side = max(2, int(round(points ** 0.5)))
+        spec = GridSpec(wb_step=0.20 / (side - 1), cement_step=0.50 / (side - 1))
+        elapsed = _median_time(lambda: optimize_strength(models['stacking_model_C'], base, 0.0, spec), repeat)
+        report.add(f"grid_{points}_rows_per_s", spec.size / elapsed, "rows/s", HIGHER)
+        report.add(f"grid_{points}_s", elapsed, "s")
+
+    report.add("pareto_default_s", _median_time(lambda: optimize_pareto(models, base), repeat), "s")
+
+
+def compare(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Return ``[(name, current, baseline, change, regressed)]`` for metrics in both."""
+    rows = []
+    for name, metric in current["metrics"].items():
+        reference = baseline.get("metrics", {}).get(name)
+        if reference is None or reference["value"] == 0:
+            continue
+        change = metric["value"] / reference["value"] - 1
+        if metric["better"] == LOWER:
+            regressed = change > tolerance
+        else:
+            regressed = change < -tolerance
+        rows.append((name, metric["value"], reference["value"], change, regressed))
+    return rows
+
+
+def run(models_path=resources.MODELS_FILE, workbook=resources.DATABASE_FILE, synthetic=False,
+        quick=False, repeat=None, log=print):
+    """Run every stage; returns ``{"meta": ..., "metrics": ...}``."""
+    repeat = repeat or (3 if quick else 5)
+    row_repeat = 30 if quick else 200
+    report = Report()
+    database = resources.load_database(workbook)
+
+    with tempfile.TemporaryDirectory(prefix="erdc-bench-") as workdir:
+        artifact = "real"
+        if synthetic or not os.path.exists(models_path):
+            from .synthetic import write_models
+
+            log("building synthetic stand-in models ...")
+            models_path = write_models(os.path.join(workdir, "synthetic.pkl"), database)
+            artifact = "synthetic"
+
+        log("cold start ...")
+        bench_cold_start(report, workbook, models_path, workdir, repeat)
+        models = resources.load_models(models_path)
+        mix = _reference_mix(database)
+
+        log("single-row latency ...")
+        bench_single_row(report, models, mix, row_repeat)
+        log("batch throughput ...")
+        bench_batch(report, models, database, [1_000] if quick else [1_000, 10_000], repeat)
+        log("optimization throughput ...")
+        bench_optimization(report, models, mix, [231, 10_000] if quick else [231, 10_000, 100_000], repeat)
+
+    from .parallel import worker_count
+
+    meta = {
+        "artifact": artifact,
+        "quick": quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": worker_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    return report.as_dict(meta)
+
+
+def format_report(result, comparison=None):
+    by_name = {row[0]: row for row in comparison or []}
+    lines = [f"{'metric':36} {'value':>14} {'unit':7} {'baseline':>14} {'change':>8}"]
+    for name, metric in result["metrics"].items():
+        line = f"{name:36} {metric['value']:14.4f} {metric['unit']:7}"
+        if name in by_name:
+            _, _, reference, change, regressed = by_name[name]
+            line += f" {reference:14.4f} {change:+8.1%}{'  REGRESSION' if regressed else ''}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _mismatch_hints(baseline, result, args):
+    """How to rerun so that ``result`` is measured like ``baseline`` (empty if it already is)."""
+    measured, current = baseline.get("meta", {}), result["meta"]
+    hints = []
+    if measured.get("quick") != current["quick"]:
+        hints.append("the baseline is a --quick run: add --quick" if measured.get("quick")
+                     else "the baseline is a full run: drop --quick")
+    if measured.get("artifact") != current["artifact"]:
+        if measured.get("artifact") == "synthetic":
+            hints.append("the baseline used the synthetic stand-in models: add --synthetic")
+        elif args.synthetic:
+            hints.append(f"the baseline used the {measured.get('artifact')} model artifact: drop --synthetic")
+        else:
+            hints.append(f"the baseline used the {measured.get('artifact')} model artifact, "
+                         f"which is missing here: provide {args.models}")
+    return hints
+
+
+def main(args):
+    result = run(args.models, args.database, synthetic=args.synthetic, quick=args.quick,
+                 repeat=args.repeat, log=lambda msg: print(msg, file=sys.stderr))
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        hints = _mismatch_hints(baseline, result, args)
+        if hints:
+            print(f"not comparing with {args.baseline}: {'; '.join(hints)} "
+                  f"(or pass --save-baseline to replace it)", file=sys.stderr)
+            baseline = None
+    comparison = compare(result, baseline, args.tolerance) if baseline else None
+    print(format_report(result, comparison))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"saved baseline to {args.baseline}", file=sys.stderr)
+    elif comparison and any(row[4] for row in comparison):
+        return 1
+    return 0
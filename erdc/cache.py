@@ -0,0 +1,70 @@
+"""Bounded LRU cache of single-row predictions, shared by every session in the process."""
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_DECIMALS = 6
+
+
+class PredictionCache:
+    """Map (model, rounded ordered feature vector) to a prediction.
+
+    Models are identified by a token that is never reused, so a reloaded model
+    artifact can never be served results computed by the previous one.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, decimals=DEFAULT_DECIMALS):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._tokens = weakref.WeakKeyDictionary()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _key(self, model, row):
+        token = self._tokens.get(model)
+        if token is None:
+            token = self._tokens.setdefault(model, next(self._counter))
+        return token, tuple(round(float(v), self.decimals) for v in row)
+
+    def get_or_compute(self, model, row, compute):
+        """Return the cached prediction for ``row`` or store ``compute()``."""
+        with self._lock:
+            key = self._key(model, row)
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+prediction_cache = PredictionCache()
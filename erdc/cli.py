@@ -0,0 +1,253 @@
+"""Command-line access to the prediction engine.
+
+    python -m erdc predict mix.json             # one mix (object) or many (list) -> JSON
+    python -m erdc predict mixes.csv -o out.csv # streamed batch scoring (CSV/XLSX)
+    python -m erdc optimize mix.json --target 40 [--pareto | --printing]
+    python -m erdc serve --port 8600            # HTTP inference service
+    python -m erdc prefork --workers 4          # preloaded, forked UI/API workers (see erdc.prefork)
+    python -m erdc verify-fastpath              # compiled vs. original predict on the database
+    python -m erdc convert-models               # split the pickle into a lazily loaded store
+    python -m erdc precompute-surfaces          # strength tables for the optimizer (see erdc.surfaces)
+    python -m erdc bench [--save-baseline]      # benchmarks (see erdc.bench)
+"""
+import argparse
+import json
+import os
+import sys
+
+from .resources import DATABASE_FILE, MODELS_FILE
+
+# Defaults of erdc.prefork and erdc.bench live here so that building the
+# parser does not import the engine (and numpy) behind them
+APPS = ("streamlit", "api")
+DEFAULT_HEALTH_PORT = 8700
+UI_SCRIPT = "UI-streamlit.py"
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+REGRESSION_TOLERANCE = 0.25
+
+
+def _read_json(path):
+    if path == '-':
+        return json.load(sys.stdin)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(payload, output):
+    text = json.dumps(payload, indent=2, default=str)
+    if output in (None, '-'):
+        sys.stdout.write(text + "\n")
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+
+
+def _is_table(path):
+    return path.lower().endswith(('.csv', '.xlsx', '.xlsm'))
+
+
+def cmd_predict(args):
+    from . import engine
+
+    models = engine.load(args.models)
+    neighbors = None
+    if args.domain:
+        from .resources import load_neighbors
+
+        neighbors = load_neighbors(args.database)
+
+    if _is_table(args.input):
+        from .batch import run_batch
+
+        if args.output in (None, '-'):
+            raise SystemExit("table input needs --output FILE.csv")
+        rows = run_batch(models, args.input, args.input, args.output, chunk_size=args.chunk_size, neighbors=neighbors)
+        print(f"scored {rows} mixes -> {args.output}", file=sys.stderr)
+        return
+
+    def predict(mix):
+        result = engine.predict(models, mix)
+        if neighbors is not None:
+            from .neighbors import SHEET_LABELS
+
+            result["domain_distance"] = {
+                SHEET_LABELS[sheet]: engine.nearest_mixes(neighbors, mix, sheet)[1] for sheet in ("df_R", "df_C_S")
+            }
+        return result
+
+    payload = _read_json(args.input)
+    if isinstance(payload, list):
+        result = [predict(mix) for mix in payload]
+    else:
+        result = predict(payload)
+    _write_json(result, args.output)
+
+
+def cmd_optimize(args):
+    from . import engine
+
+    models = engine.load(args.models)
+    mix = _read_json(args.input)
+    if args.pareto:
+        result = engine.optimize_pareto(models, mix, min_strength=args.target).front
+    elif args.printing:
+        result = engine.optimize_printing(models, mix, min_strength=args.target).ranked
+    else:
+        from .resources import load_surfaces
+
+        result = engine.optimize(models, mix, args.target, surfaces=load_surfaces(args.models))
+
+    if args.output and _is_table(args.output):
+        result.to_csv(args.output, index=False)
+    else:
+        _write_json(result.to_dict(orient='records'), args.output)
+
+
+def cmd_serve(args):
+    from .server import serve
+
+    serve(args.host, args.port, args.models, window=args.window_ms / 1000,
+          max_batch=args.max_batch, verbose=args.verbose)
+
+
+def cmd_prefork(args):
+    from .prefork import run
+
+    run(args.app, workers=args.workers, host=args.host, port=args.port, health_port=args.health_port,
+        models_path=args.models, database_path=args.database, script=args.script,
+        window=args.window_ms / 1000, max_batch=args.max_batch)
+
+
+def cmd_verify_fastpath(args):
+    from . import engine
+    from .fastpath import BUNDLE_MAX_ROWS, CompiledModel
+    from .resources import load_database
+
+    models = engine.load(args.models)
+    database = load_database(args.database)
+    failed = False
+    for key, model in models.items():
+        compiled = CompiledModel(model)
+        sheet = next((df for df in database.values() if set(compiled.feature_names) <= set(df.columns)), None)
+        X = sheet[compiled.feature_names].dropna().to_numpy(dtype=float) if sheet is not None else None
+        try:
+            errors = [compiled.verify(X)]
+            if X is not None:
+                # Row by row through the single-row path as well
+                errors += [compiled.verify(X[i:i + BUNDLE_MAX_ROWS]) for i in range(0, len(X), BUNDLE_MAX_ROWS)]
+            print(f"{key}: OK (max relative difference {max(errors):.2e} over {len(X) if X is not None else 'probe'} rows)")
+        except AssertionError as exc:
+            failed = True
+            print(f"{key}: MISMATCH ({exc})")
+    if failed:
+        raise SystemExit(1)
+
+
+def cmd_convert_models(args):
+    from .model_store import convert
+
+    out_dir = convert(args.source, args.output)
+    print(f"wrote model store {out_dir}", file=sys.stderr)
+
+
+def cmd_precompute_surfaces(args):
+    from .resources import load_models, models_digest
+    from .surfaces import build, surfaces_path_for
+
+    reference = _read_json(args.reference) if args.reference else None
+    models = load_models(args.models)
+    table = build(
+        models['stacking_model_C'], models_digest(args.models), reference,
+        progress=lambda done, total: print(f"scored SCM type {done}/{total}", file=sys.stderr),
+    )
+    out = args.output or surfaces_path_for(args.models)
+    table.save(out)
+    print(f"wrote {table.size:,} strength values to {out}", file=sys.stderr)
+
+
+def cmd_bench(args):
+    from .bench import main as bench_main
+
+    raise SystemExit(bench_main(args))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m erdc", description="3DP concrete property predictor")
+    parser.add_argument("--models", default=MODELS_FILE, help="model artifact (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("predict", help="score mixes from JSON, CSV or XLSX")
+    p.add_argument("input", help="JSON file ('-' for stdin), or CSV/XLSX table")
+    p.add_argument("-o", "--output", help="output file (JSON default: stdout)")
+    p.add_argument("--chunk-size", type=int, default=5000, help="rows per batch for table input")
+    p.add_argument("--domain", action="store_true", help="add the distance to the measured mixes (> 1: extrapolation)")
+    p.add_argument("--database", default=DATABASE_FILE, help="workbook for --domain (default: %(default)s)")
+    p.set_defaults(func=cmd_predict)
+
+    p = sub.add_parser("optimize", help="search cement/W-B for a target 28-day strength")
+    p.add_argument("input", help="JSON mix with the fixed inputs ('-' for stdin)")
+    p.add_argument("--target", type=float, required=True, help="minimum 28-day strength (MPa)")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--pareto", action="store_true", help="enforce all pass/fail limits, return the Pareto front")
+    mode.add_argument("--printing", action="store_true",
+                      help="rank printing parameters by predicted layers; --target is the 28-day 3DP strength floor")
+    p.add_argument("-o", "--output", help="output file (.csv or JSON; default: stdout)")
+    p.set_defaults(func=cmd_optimize)
+
+    p = sub.add_parser("serve", help="run the local HTTP inference service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8600)
+    p.add_argument("--window-ms", type=float, default=5.0, help="micro-batching window (default: %(default)s)")
+    p.add_argument("--max-batch", type=int, default=1024, help="rows per batched predict (default: %(default)s)")
+    p.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("prefork", help="load the models and database once, then fork Streamlit or API workers")
+    p.add_argument("app", nargs="?", choices=APPS, default="streamlit", help="what the workers run (default: %(default)s)")
+    p.add_argument("--workers", type=int, help="number of workers (default: one per core)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, help="API port, or first Streamlit port (default: 8600 / 8501)")
+    p.add_argument("--health-port", type=int, default=DEFAULT_HEALTH_PORT,
+                   help="/healthz and /readyz of the supervisor; API workers use the ports after it (default: %(default)s)")
+    p.add_argument("--database", default=DATABASE_FILE, help="workbook (default: %(default)s)")
+    p.add_argument("--script", default=UI_SCRIPT, help="Streamlit script (default: %(default)s)")
+    p.add_argument("--window-ms", type=float, default=5.0, help="API micro-batching window (default: %(default)s)")
+    p.add_argument("--max-batch", type=int, default=1024, help="API rows per batched predict (default: %(default)s)")
+    p.set_defaults(func=cmd_prefork)
+
+    p = sub.add_parser("verify-fastpath", help="check the compiled models against model.predict")
+    p.add_argument("--database", default=DATABASE_FILE, help="workbook with probe rows (default: %(default)s)")
+    p.set_defaults(func=cmd_verify_fastpath)
+
+    p = sub.add_parser("convert-models", help="split the single model pickle into a per-model store")
+    p.add_argument("source", nargs="?", default=MODELS_FILE, help="cloudpickle artifact (default: %(default)s)")
+    p.add_argument("-o", "--output", help="store directory (default: next to the source, '.models')")
+    p.set_defaults(func=cmd_convert_models)
+
+    p = sub.add_parser("precompute-surfaces", help="score the optimizer's strength tables for the current models")
+    p.add_argument("-o", "--output", help="table file (default: next to the models, '.surfaces.npz')")
+    p.add_argument("--reference", help="JSON object overriding the fixed inputs (Sand/Binder, fiber length, ...)")
+    p.set_defaults(func=cmd_precompute_surfaces)
+
+    p = sub.add_parser("bench", help="benchmark cold start, latency and throughput")
+    p.add_argument("--database", default=DATABASE_FILE, help="workbook (default: %(default)s)")
+    p.add_argument("--synthetic", action="store_true", help="use stand-in models even if the real artifact exists")
+    p.add_argument("--quick", action="store_true", help="fewer repeats and smaller sizes")
+    p.add_argument("--repeat", type=int, help="repeats per timed stage")
+    p.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON (default: %(default)s)")
+    p.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    p.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                   help="allowed slowdown before flagging a regression (default: %(default)s)")
+    p.add_argument("-o", "--output", help="also write the results as JSON")
+    p.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except (ValueError, KeyError, FileNotFoundError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,174 @@
+"""Headless prediction API: everything the Streamlit tabs compute, without Streamlit.
+
+Importing this module only pulls in numpy; pandas, scikit-learn and the model
+artifact are loaded on first use.  Every function takes the ``models`` dict
+returned by :func:`load` (or ``erdc.resources.load_models``)::
+
+    from erdc import engine
+
+    models = engine.load()
+    engine.predict(models, {"Cement content (%)": 60, ..., "CaO in SCM": 11.83, ...})
+"""
+import os
+
+from . import metrics
+from .cache import prediction_cache
+from .fastpath import compile_model
+from .mix import (
+    AGES, PRINTING_FEATURES, compressive_features_list, compute_nc, extra_features, fiber_type_options,
+    rheology_features_list, rheology_models, rheology_pass, strength_pass,
+)
+from .resources import MODELS_FILE
+
+# Single-row predicts use the precompiled NumPy path (erdc.fastpath); ERDC_FAST_PATH=0 disables it
+FAST_PATH = os.environ.get("ERDC_FAST_PATH", "1") != "0"
+
+
+def load(path=MODELS_FILE):
+    """Return the trained models (loaded once per process)."""
+    from .resources import load_models
+
+    return load_models(path)
+
+
+def prepare_mix(mix):
+    """Return a copy of ``mix`` with a numeric fiber type and Nc derived from the SCM oxides.
+
+    An explicit ``Nc`` is kept; otherwise the three oxide keys are required.
+    Unknown fiber names raise ``ValueError``.
+    """
+    mix = dict(mix)
+    fiber = mix.get('Fiber Type', 0)
+    if isinstance(fiber, str):
+        if fiber.strip() not in fiber_type_options:
+            raise ValueError(f"unknown fiber type {fiber!r}; expected one of {', '.join(fiber_type_options)}")
+        mix['Fiber Type'] = fiber_type_options[fiber.strip()]
+    if mix.get('Nc') is None:
+        missing = [key for key in extra_features if key not in mix]
+        if missing:
+            raise ValueError(f"'Nc' is missing and cannot be computed without: {', '.join(missing)}")
+        mix['Nc'] = compute_nc(*(mix[key] for key in extra_features))
+    return mix
+
+
+def _predict_one(models, key, mix, features):
+    """Predict one mix with ``models[key]``, memoized on the rounded feature vector in ``features`` order."""
+    model = models[key]
+    missing = [f for f in features if f not in mix]
+    if missing:
+        raise ValueError(f"missing inputs: {', '.join(missing)}")
+    row = [mix[f] for f in features]
+
+    compiled = compile_model(model) if FAST_PATH else None
+    if compiled is not None:
+        def compute():
+            with metrics.timed(f"predict.{key}"):
+                return compiled.predict_row([mix[f] for f in compiled.feature_names])
+    else:
+        def compute():
+            import pandas as pd
+
+            with metrics.timed(f"predict.{key}"):
+                return float(model.predict(pd.DataFrame([row], columns=list(features)))[0])
+
+    return prediction_cache.get_or_compute(model, row, compute)
+
+
+def predict_rheology(models, mix):
+    """Predicted rheology of one prepared mix, keyed by display name."""
+    return {name: _predict_one(models, key, mix, rheology_features_list) for name, key in rheology_models.items()}
+
+
+def predict_compressive(models, mix, ages=AGES, surfaces=None):
+    """Predicted compressive strength (MPa) of one prepared mix at each age.
+
+    Mixes on the nodes of ``surfaces`` (``erdc.resources.load_surfaces``) are looked up.
+    """
+    result = {}
+    for age in ages:
+        value = surfaces.lookup_mix(mix, age) if surfaces is not None else None
+        if value is None:
+            value = _predict_one(models, 'stacking_model_C', {**mix, 'Age': age}, compressive_features_list)
+        result[age] = value
+    return result
+
+
+def predict_layers(models, mix, printing):
+    """Predicted maximum number of printed layers; ``printing`` holds the three printing parameters."""
+    features = models["stacking_model_L"].feature_names_in_
+    return _predict_one(models, "stacking_model_L", {**mix, **printing}, features)
+
+
+def predict_printed_strength(models, mix, printing, ages=AGES):
+    """Predicted 3DP compressive strength (MPa) at each age."""
+    features = models["stacking_model_S"].feature_names_in_
+    return {age: _predict_one(models, "stacking_model_S", {**mix, **printing, 'Age': age}, features) for age in ages}
+
+
+def predict(models, mix, printing=None):
+    """Score one mix: rheology, 7/28-day strength, PASS/Fail checks and, if given, 3DP results.
+
+    ``printing`` may be passed separately or as keys of ``mix``.
+    """
+    mix = prepare_mix(mix)
+    if printing is None and all(key in mix for key in PRINTING_FEATURES):
+        printing = {key: mix[key] for key in PRINTING_FEATURES}
+    fiber = mix.get('Fiber Type', 0)
+
+    rheology = predict_rheology(models, mix)
+    compressive = predict_compressive(models, mix)
+    checks = {name: bool(rheology_pass(name, value, fiber)) for name, value in rheology.items()}
+    checks.update({f"{age} days": bool(strength_pass(age, value, fiber)) for age, value in compressive.items()})
+
+    result = {
+        "Nc": float(mix['Nc']),
+        "rheology": rheology,
+        "compressive": compressive,
+        "checks": checks,
+        "all_pass": all(checks.values()),
+    }
+    if printing is not None:
+        result["max_layers"] = predict_layers(models, mix, printing)
+        result["printed_strength"] = predict_printed_strength(models, mix, printing)
+    return result
+
+
+def predict_batch(models, mixes, include_3dp=None, neighbors=None):
+    """Score a DataFrame of mixes; same columns as the batch upload (see ``erdc.batch``)."""
+    from .batch import prepare_mixes, score_mixes
+
+    return score_mixes(models, prepare_mixes(mixes), include_3dp, neighbors)
+
+
+def nearest_mixes(neighbors, mix, sheet="df_C_S", k=None):
+    """Closest measured mixes to one mix in a database sheet, plus its domain distance (> 1: extrapolation).
+
+    ``neighbors`` comes from ``erdc.resources.load_neighbors``; strength sheets are queried at 28 days
+    unless ``mix`` has an ``Age``.
+    """
+    index = neighbors[sheet]
+    mix = prepare_mix(mix)
+    defaults = {'Age': 28}
+    return index.nearest(mix, k, defaults), float(index.domain_distance(mix, defaults)[0])
+
+
+def optimize(models, mix, target_strength, spec=None, surfaces=None, interpolate=False):
+    """Target-strength grid sweep over W/B and cement fraction (``erdc.optimize.GridSpec``)."""
+    from .optimize import optimize_strength
+
+    return optimize_strength(models['stacking_model_C'], prepare_mix(mix), target_strength, spec,
+                             surfaces=surfaces, interpolate=interpolate)
+
+
+def optimize_pareto(models, mix, space=None, min_strength=None, **kwargs):
+    """Constrained strength vs. cement Pareto search (see ``erdc.optimize.optimize_pareto``)."""
+    from .optimize import optimize_pareto as _optimize_pareto
+
+    return _optimize_pareto(models, prepare_mix(mix), space, min_strength=min_strength, **kwargs)
+
+
+def optimize_printing(models, mix, min_strength=None, **kwargs):
+    """Printing speed / nozzle / layer height search for maximum layers (see ``erdc.optimize.optimize_printing``)."""
+    from .optimize import optimize_printing as _optimize_printing
+
+    return _optimize_printing(models, prepare_mix(mix), min_strength=min_strength, **kwargs)
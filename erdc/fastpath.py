@@ -0,0 +1,328 @@
+"""Precompiled single-row inference for the stacking models.
+
+``model.predict`` on a one-row DataFrame spends most of its time in pandas and
+in scikit-learn's input validation, which runs again for every base estimator
+of a stacking ensemble.  :func:`compile_model` walks a fitted estimator once
+and returns a :class:`CompiledModel` whose ``predict`` works directly on a
+float64 NumPy array laid out like ``feature_names_in_``:
+
+* stacking, pipelines, standard/min-max scalers and linear models become
+  plain NumPy arithmetic on the stored coefficients;
+* trees, random forests / extra trees and gradient boosting call the fitted
+  ``tree_`` objects directly, and walk all trees of an ensemble at once for
+  a few rows (node arrays prebuilt by ``erdc.model_store`` are used as is);
+* anything else falls back to the estimator's own ``predict``.
+
+Feature order is checked against every nested ``feature_names_in_`` when the
+model is compiled, and the compiled function is compared with the original
+``predict`` on a probe sample (:meth:`CompiledModel.verify`).  A model that does
+not match is never used in compiled form.
+"""
+import threading
+import weakref
+
+import numpy as np
+
+# Linear models whose predict is exactly X @ coef_ + intercept_
+_LINEAR_MODELS = {
+    "LinearRegression", "Ridge", "RidgeCV", "Lasso", "LassoCV", "ElasticNet", "ElasticNetCV",
+    "Lars", "LarsCV", "LassoLars", "LassoLarsCV", "LassoLarsIC", "BayesianRidge",
+    "ARDRegression", "HuberRegressor", "SGDRegressor", "OrthogonalMatchingPursuit",
+    "TheilSenRegressor",
+}
+_TREE_ENSEMBLES = {"RandomForestRegressor", "ExtraTreesRegressor"}
+_IDENTITY_LOSSES = {"squared_error", "absolute_error", "huber", "quantile"}
+
+# Up to this many rows, all trees of an ensemble are walked together in NumPy
+# instead of calling each tree's Cython predict separately
+BUNDLE_MAX_ROWS = 16
+
+VERIFY_ROWS = 64
+VERIFY_RTOL = 1e-9
+
+
+class FeatureOrderError(ValueError):
+    """Raised when a nested estimator was fitted on a different feature order."""
+
+
+def _check_feature_order(estimator, feature_names):
+    nested = getattr(estimator, "feature_names_in_", None)
+    if nested is not None and feature_names is not None and list(nested) != list(feature_names):
+        raise FeatureOrderError(
+            f"{type(estimator).__name__} expects {list(nested)}, got {list(feature_names)}"
+        )
+
+
+def _fallback(estimator, feature_names):
+    """Use the estimator's own predict, with the column names it was fitted on."""
+    names = getattr(estimator, "feature_names_in_", None)
+    if names is None:
+        return lambda X: np.asarray(estimator.predict(X), dtype=float).ravel()
+
+    import pandas as pd
+
+    columns = list(names)
+    return lambda X: np.asarray(estimator.predict(pd.DataFrame(X, columns=columns)), dtype=float).ravel()
+
+
+def _compile_transform(step):
+    name = type(step).__name__
+    if name == "StandardScaler":
+        mean = step.mean_ if step.with_mean else None
+        scale = step.scale_ if step.with_std else None
+
+        def transform(X):
+            if mean is not None:
+                X = X - mean
+            if scale is not None:
+                X = X / scale
+            return X
+        return transform
+    if name == "MinMaxScaler" and not step.clip:
+        scale, offset = step.scale_, step.min_
+        return lambda X: X * scale + offset
+    if name in ("passthrough", "NoneType"):
+        return lambda X: X
+    return None
+
+
+def _tree_predict(tree):
+    def predict(X32):
+        return tree.predict(X32).reshape(len(X32))
+    return predict
+
+
+class _TreeBundle:
+    """All trees of an ensemble flattened into shared node arrays.
+
+    Walking every tree at once costs one NumPy step per tree level instead of
+    one Cython call per tree, which is what matters for a single row.  Splits
+    compare the float32-cast feature with the stored threshold, like sklearn.
+    """
+
+    ARRAYS = ("roots", "left", "right", "feature", "threshold", "value")
+
+    def __init__(self, trees):
+        offsets = np.cumsum([0] + [t.node_count for t in trees[:-1]])
+        self.roots = offsets.astype(np.intp)
+        self.left = np.concatenate([np.where(t.children_left < 0, -1, t.children_left + o) for t, o in zip(trees, offsets)])
+        self.right = np.concatenate([np.where(t.children_right < 0, -1, t.children_right + o) for t, o in zip(trees, offsets)])
+        self.feature = np.concatenate([np.maximum(t.feature, 0) for t in trees]).astype(np.intp)
+        self.threshold = np.concatenate([t.threshold for t in trees])
+        self.value = np.concatenate([t.value.reshape(t.node_count, -1)[:, 0] for t in trees])
+        self.depth = max(t.max_depth for t in trees)
+
+    @classmethod
+    def from_arrays(cls, arrays, depth):
+        """Bundle over existing node arrays, e.g. read-only views of a model store file."""
+        bundle = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(bundle, name, arrays[name])
+        bundle.depth = depth
+        return bundle
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def leaf_values(self, X32):
+        """``(n_rows, n_trees)`` leaf values."""
+        rows = np.arange(len(X32))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X32), len(self.roots))).copy()
+        for _ in range(self.depth):
+            left = self.left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X32[rows, self.feature[nodes]].astype(float) <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+        return self.value[nodes]
+
+
+def _ensemble_trees(estimator):
+    """The fitted ``tree_`` objects of a random forest, extra trees or gradient boosting regressor."""
+    if type(estimator).__name__ == "GradientBoostingRegressor":
+        return [est.tree_ for est in estimator.estimators_[:, 0]]
+    return [est.tree_ for est in estimator.estimators_]
+
+
+def tree_ensembles(model):
+    """Yield the tree ensembles nested in ``model`` that compile to a bundle, always in the same order."""
+    name = type(model).__name__
+    if name == "StackingRegressor":
+        for estimator in model.estimators_:
+            yield from tree_ensembles(estimator)
+        yield from tree_ensembles(model.final_estimator_)
+    elif name == "Pipeline":
+        for _, step in model.steps:
+            yield from tree_ensembles(step)
+    elif name in _TREE_ENSEMBLES and model.n_outputs_ == 1 or name == "GradientBoostingRegressor":
+        yield model
+
+
+def bundle_arrays(estimator):
+    """``(arrays, depth)`` of the flattened node arrays for an ensemble from :func:`tree_ensembles`."""
+    bundle = _TreeBundle(_ensemble_trees(estimator))
+    return bundle.arrays(), bundle.depth
+
+
+# Prebuilt bundles per ensemble object (see use_bundle)
+_prebuilt = weakref.WeakKeyDictionary()
+
+
+def use_bundle(estimator, arrays, depth):
+    """Have compiled models walk ``estimator``'s trees with the given node arrays instead of a private copy.
+
+    ``arrays`` and ``depth`` are what :func:`bundle_arrays` returns for it.  Returns
+    False (and changes nothing) if they do not have the ensemble's shape.
+    """
+    trees = _ensemble_trees(estimator)
+    if len(arrays["roots"]) != len(trees) or len(arrays["left"]) != sum(t.node_count for t in trees):
+        return False
+    _prebuilt[estimator] = _TreeBundle.from_arrays(arrays, depth)
+    return True
+
+
+def _bundle(estimator):
+    bundle = _prebuilt.get(estimator)
+    return bundle if bundle is not None else _TreeBundle(_ensemble_trees(estimator))
+
+
+def _compile(estimator, feature_names):
+    """Return ``f(X) -> 1-D predictions`` for a float64 array ordered like ``feature_names``."""
+    name = type(estimator).__name__
+    _check_feature_order(estimator, feature_names)
+
+    if name == "StackingRegressor":
+        bases = [_compile(est, feature_names) for est in estimator.estimators_]
+        final = _compile(estimator.final_estimator_, None)
+        passthrough = estimator.passthrough
+        if any(method != "predict" for method in estimator.stack_method_):
+            return _fallback(estimator, feature_names)
+
+        def predict(X):
+            stacked = np.column_stack([base(X) for base in bases])
+            if passthrough:
+                stacked = np.hstack([stacked, X])
+            return final(stacked)
+        return predict
+
+    if name == "Pipeline":
+        steps = [step for _, step in estimator.steps]
+        transforms = [_compile_transform(step) for step in steps[:-1]]
+        if any(t is None for t in transforms):
+            return _fallback(estimator, feature_names)
+        last = _compile(steps[-1], None)
+
+        def predict(X):
+            for transform in transforms:
+                X = transform(X)
+            return last(X)
+        return predict
+
+    if name in _LINEAR_MODELS and np.ndim(getattr(estimator, "coef_", None)) == 1:
+        coef = np.asarray(estimator.coef_, dtype=float)
+        intercept = float(np.ravel(estimator.intercept_)[0]) if np.ndim(estimator.intercept_) else float(estimator.intercept_)
+        return lambda X: X @ coef + intercept
+
+    if name in ("DecisionTreeRegressor", "ExtraTreeRegressor") and estimator.n_outputs_ == 1:
+        tree = _tree_predict(estimator.tree_)
+        return lambda X: tree(np.ascontiguousarray(X, dtype=np.float32))
+
+    if name in _TREE_ENSEMBLES and estimator.n_outputs_ == 1:
+        bundle = _bundle(estimator)
+        trees = [_tree_predict(tree) for tree in _ensemble_trees(estimator)]
+
+        def predict(X):
+            X32 = np.ascontiguousarray(X, dtype=np.float32)
+            if len(X32) <= BUNDLE_MAX_ROWS:
+                return bundle.leaf_values(X32).sum(axis=1) / len(trees)
+            total = trees[0](X32).astype(float)
+            for tree in trees[1:]:
+                total += tree(X32)
+            return total / len(trees)
+        return predict
+
+    if name == "GradientBoostingRegressor" and estimator.loss in _IDENTITY_LOSSES:
+        init = estimator.init_
+        if init == "zero":
+            baseline = 0.0
+        elif type(init).__name__ == "DummyRegressor":
+            baseline = float(np.ravel(init.constant_)[0])
+        else:
+            return _fallback(estimator, feature_names)
+        bundle = _bundle(estimator)
+        trees = [_tree_predict(tree) for tree in _ensemble_trees(estimator)]
+        rate = estimator.learning_rate
+
+        def predict(X):
+            X32 = np.ascontiguousarray(X, dtype=np.float32)
+            if len(X32) <= BUNDLE_MAX_ROWS:
+                return baseline + rate * bundle.leaf_values(X32).sum(axis=1)
+            total = np.full(len(X), baseline)
+            for tree in trees:
+                total += rate * tree(X32)
+            return total
+        return predict
+
+    return _fallback(estimator, feature_names)
+
+
+class CompiledModel:
+    """Fast ``predict`` for a fitted estimator on preordered NumPy rows."""
+
+    def __init__(self, model):
+        self.model = model
+        names = getattr(model, "feature_names_in_", None)
+        self.feature_names = list(names) if names is not None else None
+        self._predict = _compile(model, self.feature_names)
+
+    def predict(self, X):
+        """Predictions for a 2-D array whose columns follow ``feature_names``."""
+        return self._predict(np.asarray(X, dtype=float).reshape(-1, len(self.feature_names)))
+
+    def predict_row(self, row):
+        """Prediction for one row ordered like ``feature_names``."""
+        return float(self._predict(np.asarray(row, dtype=float).reshape(1, -1))[0])
+
+    def verify(self, X=None, rtol=VERIFY_RTOL):
+        """Largest relative difference from the original ``predict``; raises if above ``rtol``.
+
+        ``X`` defaults to a deterministic random probe sample in [0, 100).
+        """
+        import pandas as pd
+
+        if X is None:
+            X = np.random.default_rng(0).uniform(0, 100, size=(VERIFY_ROWS, len(self.feature_names)))
+        X = np.asarray(X, dtype=float)
+        expected = np.asarray(self.model.predict(pd.DataFrame(X, columns=self.feature_names)), dtype=float).ravel()
+        # Both the many-row and the few-row (bundled tree) code paths
+        actual = np.concatenate([self.predict(X), self.predict(X[:BUNDLE_MAX_ROWS])])
+        expected = np.concatenate([expected, expected[:BUNDLE_MAX_ROWS]])
+        error = float(np.max(np.abs(actual - expected) / (1.0 + np.abs(expected))))
+        if not error <= rtol:
+            raise AssertionError(f"compiled {type(self.model).__name__} differs from predict by {error:.3g}")
+        return error
+
+
+_compiled = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def compile_model(model):
+    """Return the verified :class:`CompiledModel` for ``model``, or None if it cannot be compiled.
+
+    Results are cached per model object, so compilation and verification run once.
+    """
+    with _lock:
+        if model in _compiled:
+            return _compiled[model]
+        compiled = None
+        if getattr(model, "feature_names_in_", None) is not None:
+            try:
+                compiled = CompiledModel(model)
+                compiled.verify()
+            except Exception:
+                # Unsupported layout or mismatch: callers keep using model.predict
+                compiled = None
+        _compiled[model] = compiled
+        return compiled
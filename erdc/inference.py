@@ -0,0 +1,54 @@
+"""Batched model evaluation."""
+import math
+
+import numpy as np
+
+from . import metrics, parallel
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def predict_many(jobs, chunk_size=DEFAULT_CHUNK_SIZE, names=None):
+    """Score several ``(model, frame)`` jobs; returns one prediction array per job.
+
+    Independent models and row chunks are spread over the shared worker pool
+    when there are enough rows to pay for it, otherwise they run serially.
+    No predict call sees more than ``chunk_size`` rows.  ``names`` label the
+    jobs in ``erdc.metrics`` (``predict_batch.<name>``).
+    """
+    names = names or ["model"] * len(jobs)
+    total = sum(len(frame) for _, frame in jobs)
+    use_pool = total >= parallel.MIN_PARALLEL_ROWS
+    workers = parallel.worker_count() if use_pool else 1
+
+    pieces = []
+    for index, (model, frame) in enumerate(jobs):
+        n = len(frame)
+        size = chunk_size
+        if use_pool:
+            # Enough chunks to occupy every worker, but not uselessly small ones
+            size = min(chunk_size, max(parallel.MIN_CHUNK_ROWS, math.ceil(n / workers)))
+        for start in range(0, n, size):
+            pieces.append((index, start, min(start + size, n)))
+
+    def task(model, frame, start, stop, stage):
+        part = frame if (start, stop) == (0, len(frame)) else frame.iloc[start:stop]
+
+        def run():
+            with metrics.timed(stage):
+                return np.asarray(model.predict(part), dtype=float).ravel()
+        return run
+
+    tasks = [task(*jobs[index], start, stop, f"predict_batch.{names[index]}") for index, start, stop in pieces]
+    results = parallel.run(tasks, parallel=use_pool)
+
+    outputs = [np.empty(len(frame), dtype=float) for _, frame in jobs]
+    for (index, start, stop), values in zip(pieces, results):
+        outputs[index][start:stop] = values
+    return outputs
+
+
+def predict_chunked(model, frame, chunk_size=DEFAULT_CHUNK_SIZE, name="model"):
+    """Score every row of ``frame`` with as few ``predict`` calls as memory allows."""
+    return predict_many([(model, frame)], chunk_size, [name])[0]
+
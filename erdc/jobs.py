@@ -0,0 +1,97 @@
+"""Background optimization jobs with progress, partial results and cancellation.
+
+A job runs its search on a dedicated daemon thread (not the predict pool, which
+the search itself fans out onto) and is polled by the UI. The search function
+receives a ``progress(done, total, partial)`` callback as its ``progress``
+keyword; cancelling a job makes the next call to that callback raise
+:class:`JobCancelled`, so work stops at the next scored slice.
+"""
+import threading
+import time
+import traceback
+import uuid
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+FINISHED = frozenset({DONE, CANCELLED, FAILED})
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's progress callback once the job has been cancelled."""
+
+
+class Job:
+    """State of one background search, safe to read from any thread."""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = PENDING
+        self.done = 0
+        self.total = 0
+        self.partials = []
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.status not in FINISHED
+
+    @property
+    def fraction(self):
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def cancel(self):
+        """Ask the job to stop; it finishes as ``cancelled`` at its next progress step."""
+        self._cancel.set()
+
+    def snapshot(self):
+        """Consistent ``(status, done, total, partials)`` for rendering."""
+        with self._lock:
+            return self.status, self.done, self.total, list(self.partials)
+
+    def _progress(self, done, total, partial=None):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        with self._lock:
+            self.done, self.total = done, total
+            if partial is not None:
+                self.partials.append(partial)
+
+    def _run(self, fn, args, kwargs):
+        self.started = time.perf_counter()
+        self.status = RUNNING
+        try:
+            result = fn(*args, progress=self._progress, **kwargs)
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as exc:
+            self.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+            status = FAILED
+        else:
+            self.result = result
+            status = DONE
+        self.finished = time.perf_counter()
+        self.status = status
+
+
+def start(kind, fn, *args, **kwargs):
+    """Run ``fn(*args, progress=..., **kwargs)`` in the background and return its :class:`Job`."""
+    job = Job(kind)
+    thread = threading.Thread(target=job._run, args=(fn, args, kwargs), name=f"erdc-job-{kind}", daemon=True)
+    thread.start()
+    return job
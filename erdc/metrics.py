@@ -0,0 +1,168 @@
+"""Per-stage timing and call counts for the hot paths, off unless enabled.
+
+Enable with ``ERDC_METRICS=1`` or :func:`enable` (the UI's performance panel
+does this).  While disabled :func:`timed` hands back one shared no-op context
+manager, so instrumented code pays a function call and nothing else.
+
+Stages are dotted names such as ``predict.stacking_model_C`` or
+``workbook.parse``.  :func:`prometheus_text` renders the counters in the
+Prometheus text exposition format and :func:`log_snapshot` writes them as one
+JSON log record; :func:`log_snapshot_every` does so at most once per interval,
+for processes nothing scrapes (the Streamlit UI calls it after every rerun).
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+_enabled = os.environ.get("ERDC_METRICS", "0") == "1"
+_lock = threading.Lock()
+_stats = {}
+
+LOG_INTERVAL = 60.0
+_last_logged = None
+
+logger = logging.getLogger("erdc.metrics")
+
+
+class _Stat:
+    __slots__ = ("calls", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+_NULL = _NullTimer()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Turn collection on or off for the whole process."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def timed(stage):
+    """Context manager adding the elapsed time of its block to ``stage``."""
+    return _Timer(stage) if _enabled else _NULL
+
+
+def record(stage, seconds, calls=1):
+    """Add ``seconds`` (and ``calls``) to ``stage``; ignored while disabled."""
+    if not _enabled:
+        return
+    with _lock:
+        stat = _stats.get(stage)
+        if stat is None:
+            stat = _stats[stage] = _Stat()
+        stat.calls += calls
+        stat.seconds += seconds
+        if seconds > stat.max_seconds:
+            stat.max_seconds = seconds
+
+
+def snapshot():
+    """``{stage: {"calls", "seconds", "max_seconds"}}`` sorted by stage."""
+    with _lock:
+        return {
+            stage: {"calls": s.calls, "seconds": s.seconds, "max_seconds": s.max_seconds}
+            for stage, s in sorted(_stats.items())
+        }
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(extra_gauges=None):
+    """Counters in Prometheus text format; ``extra_gauges`` maps metric name (labels allowed) to value."""
+    stats = snapshot()
+    lines = [
+        "# HELP erdc_stage_calls_total Calls per instrumented stage.",
+        "# TYPE erdc_stage_calls_total counter",
+    ]
+    lines += [f'erdc_stage_calls_total{{stage="{_label(k)}"}} {v["calls"]}' for k, v in stats.items()]
+    lines += [
+        "# HELP erdc_stage_seconds_total Wall time spent per instrumented stage.",
+        "# TYPE erdc_stage_seconds_total counter",
+    ]
+    lines += [f'erdc_stage_seconds_total{{stage="{_label(k)}"}} {v["seconds"]:.9f}' for k, v in stats.items()]
+    lines += [
+        "# HELP erdc_stage_seconds_max Slowest single call per stage.",
+        "# TYPE erdc_stage_seconds_max gauge",
+    ]
+    lines += [f'erdc_stage_seconds_max{{stage="{_label(k)}"}} {v["max_seconds"]:.9f}' for k, v in stats.items()]
+    declared = set()
+    for name, value in (extra_gauges or {}).items():
+        base = name.split("{", 1)[0]    # names may carry labels
+        if base not in declared:
+            declared.add(base)
+            lines.append(f"# TYPE {base} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def log_snapshot(level=logging.INFO):
+    """Emit the current counters as one structured (JSON) log record.
+
+    Without any logging configured the record goes to stderr.
+    """
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    logger.log(level, json.dumps({"event": "erdc.metrics", "pid": os.getpid(), "stages": snapshot()}))
+
+
+def log_snapshot_every(interval=LOG_INTERVAL):
+    """:func:`log_snapshot` if collection is on and ``interval`` seconds passed since the last one.
+
+    Cheap enough to call on every request or rerun; returns True when it logged.
+    """
+    global _last_logged
+    if not _enabled:
+        return False
+    now = time.monotonic()
+    with _lock:
+        if _last_logged is not None and now - _last_logged < interval:
+            return False
+        _last_logged = now
+    log_snapshot()
+    return True
@@ -0,0 +1,163 @@
+"""Mix-design feature definitions and derived quantities shared by the UI and scripts."""
+import numpy as np
+
+# Explicit input feature names (MODEL KEYS — do not change)
+compressive_features_list = [
+    'Cement content (%)', 'Limestone content (%)', 'Silica fume content (%)',
+    'SCM content (%)', 'Nc', 'SSA of SCM (m2/g)', 'Water/Binder',
+    'Sand/Binder', 'Aggregate/Binder', 'Fiber length (mm)', 'Fiber Volume (%)',
+    'Fiber Type', 'Age'
+]
+
+rheology_features_list = [
+    'Cement content (%)', 'Limestone content (%)', 'Silica fume content (%)',
+    'SCM content (%)', 'Nc', 'SSA of SCM (m2/g)', 'Water/Binder',
+    'Sand/Binder', 'Aggregate/Binder', 'Fiber length (mm)', 'Fiber Volume (%)',
+    'Fiber Type', 'Mini-slump after joint'
+]
+
+# Additional inputs for Nc calculation (MODEL KEYS)
+extra_features = ['CaO in SCM', 'Al2O3 in SCM', 'SiO2 in SCM']
+
+# Printing parameters of the 3DP layer and strength models (MODEL KEYS)
+PRINTING_FEATURES = ['Printing speed (mm/s)', 'nozzle size (mm)', 'single layer height (mm)']
+
+# Curing ages (days) the strength models are scored at
+AGES = (7, 28)
+
+
+def compute_nc(cao, al2o3, sio2):
+    """Alkalinity index Nc from the SCM oxide contents.
+
+    Accepts scalars or equally shaped arrays; scalars in give a float out.
+    """
+    cao = np.asarray(cao, dtype=float)
+    al2o3 = np.asarray(al2o3, dtype=float)
+    sio2 = np.asarray(sio2, dtype=float)
+
+    total = cao + al2o3 + sio2
+    nonzero = total != 0
+    safe_total = np.where(nonzero, total, 1.0)
+    norm_cao = np.where(nonzero, cao / safe_total, 0.0)
+    norm_al2o = np.where(nonzero, al2o3 / safe_total, 0.0)
+    reg = norm_al2o - norm_cao
+
+    denominator = 3 - 2 * norm_cao + 2 * norm_al2o
+    numerator = np.select(
+        [reg < (-2/3), reg <= 0],
+        [11 + norm_al2o - 10 * norm_cao, 11 + 10 * norm_al2o - 10 * norm_cao],
+        11 + 13 * norm_al2o - 13 * norm_cao,
+    )
+    nc = numerator / denominator
+    return float(nc) if nc.ndim == 0 else nc
+
+
+# Predefined SCM compositions: [SSA, CaO, Al2O3, SiO2]
+scm_defaults = {
+    "Calcined clay": [12.067, 0.73, 35.27, 57.05],
+    "F fly ash": [2.153, 11.83, 19.48, 43.59],
+    "C fly ash": [2.973, 29.51, 18.07, 37.29],
+    "Ground granulated blast furnace slag": [1.084, 42.73, 8.58, 35.9],
+    "MSWI ash": [12.086, 52.85, 6.85, 12.91],
+    "Steel slag": [0.854, 62.75, 9.9, 16.09],
+    "Glass powder": [0.233, 12.54, 1.16, 74.8],
+    "None": [0.0, 0.0, 0.0, 0.0]
+}
+
+# Fiber type codes used by the models
+fiber_type_options = {
+    "None": 0,
+    "Steel": 1,
+    "PVA": 2,
+    "PP": 3,
+    "Glass": 4,
+    "Hemp": 5
+}
+
+# Rheology targets and the model predicting each (display name -> MODEL KEY)
+rheology_models = {
+    "Water Retention": "stacking_model_R1",
+    "Dynamic Yield Stress (Pa)": "stacking_model_R2",
+    "Plastic Viscosity (Pa·s)": "stacking_model_R3",
+    "Static Flocculation Stress (Pa)": "stacking_model_R4",
+    "Athix (Pa/min)": "stacking_model_R5",
+}
+
+# --- Ranges for PASS/FAIL logic ---
+# Rheology thresholds (low, high) — choose set by fiber presence
+RANGES_WITH_FIBER = {
+    "Water Retention": (None, 12),                # <= 12  (I-CAR)
+    "Dynamic Yield Stress (Pa)": (583, 1066),     # 583–1066 (I-CAR)
+    "Plastic Viscosity (Pa·s)": (2.5, 4.4),       # 2.5–4.4 (I-CAR)
+    "Static Flocculation Stress (Pa)": (200, 500), # 200–500 (I-CAR)
+    "Athix (Pa/min)": (8, 25),                    # 8–25  (I-CAR)
+}
+RANGES_NO_FIBER = {
+    "Water Retention": (None, 8),                 # <= 8   (I-CAR)
+    "Dynamic Yield Stress (Pa)": (422, 905),
+    "Plastic Viscosity (Pa·s)": (3.7, 8.8),
+    "Static Flocculation Stress (Pa)": (200, 1000),
+    "Athix (Pa/min)": (10, 80),
+}
+
+# Compressive strength thresholds (MPa) — choose set by fiber presence
+COMPRESSIVE_WITH_FIBER = {
+    7: 10,
+    28: 25,
+}
+COMPRESSIVE_NO_FIBER = {
+    7: 10,
+    28: 30,
+}
+
+
+def rheology_ranges(fiber_type_num):
+    """Rheology (low, high) limits for the given fiber type code."""
+    return RANGES_NO_FIBER if fiber_type_num == 0 else RANGES_WITH_FIBER
+
+
+def compressive_thresholds(fiber_type_num):
+    """Minimum compressive strength by age for the given fiber type code."""
+    return COMPRESSIVE_NO_FIBER if fiber_type_num == 0 else COMPRESSIVE_WITH_FIBER
+
+
+def range_violation(values, lo, hi):
+    """Relative distance of ``values`` outside ``[lo, hi]`` (0 where inside; None is unbounded)."""
+    values = np.asarray(values, dtype=float)
+    if lo is not None and hi is not None:
+        scale = max(hi - lo, 1e-12)
+    else:
+        scale = max(abs(lo if lo is not None else hi), 1.0)
+    violation = np.zeros_like(values)
+    if lo is not None:
+        violation += np.maximum(lo - values, 0.0)
+    if hi is not None:
+        violation += np.maximum(values - hi, 0.0)
+    return violation / scale
+
+
+def _within(values, lo, hi):
+    ok = np.ones(values.shape, dtype=bool)
+    if lo is not None:
+        ok &= values >= lo
+    if hi is not None:
+        ok &= values <= hi
+    return ok
+
+
+def rheology_pass(name, values, fiber_type_num):
+    """Vectorized PASS test of a rheology prediction; ``fiber_type_num`` may vary per row."""
+    values = np.asarray(values, dtype=float)
+    no_fiber = _within(values, *RANGES_NO_FIBER.get(name, (None, None)))
+    with_fiber = _within(values, *RANGES_WITH_FIBER.get(name, (None, None)))
+    return np.where(np.asarray(fiber_type_num) == 0, no_fiber, with_fiber)
+
+
+def strength_pass(age, values, fiber_type_num):
+    """Vectorized PASS test of a compressive strength prediction at ``age`` days."""
+    values = np.asarray(values, dtype=float)
+    results = []
+    for thresholds in (COMPRESSIVE_NO_FIBER, COMPRESSIVE_WITH_FIBER):
+        min_strength = thresholds.get(age)
+        results.append(values >= min_strength if min_strength is not None else np.zeros(values.shape, dtype=bool))
+    return np.where(np.asarray(fiber_type_num) == 0, *results)
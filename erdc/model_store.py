@@ -0,0 +1,204 @@
+"""Split model artifact: one lazily loaded file per model, tree node arrays memory-mapped.
+
+Layout of a store directory (``python -m erdc convert-models`` builds one from
+the single cloudpickle file)::
+
+    3DP_November_2025.models/
+        manifest.json               # keys, files, array offsets, source SHA-256
+        stacking_model_C.pkl        # pickle stream (protocol 5)
+        stacking_model_C.bin        # its large NumPy buffers and tree bundles, 64-byte aligned
+        ...
+
+:class:`ModelStore` behaves like the ``models`` dict but only unpickles a
+model on first access, so ``stacking_model_L``/``stacking_model_S`` cost
+nothing until 3DP prediction is used.
+
+The ``.bin`` file is mapped read-only.  Besides the pickle's out-of-band
+buffers it holds the flattened node arrays that ``erdc.fastpath`` walks for
+few-row predictions of each tree ensemble (:func:`fastpath.tree_ensembles`).
+Those are used in place, so every process on the host shares them through
+the page cache instead of building its own copy.  The estimators themselves
+are no cheaper: scikit-learn's ``Tree`` copies its node arrays while
+unpickling, so each process still holds a private copy of the trees and
+loads them no faster than from the single pickle.
+"""
+import json
+import os
+import pickle
+import re
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+
+from . import metrics
+from .fastpath import bundle_arrays, tree_ensembles, use_bundle
+
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+ALIGNMENT = 64
+# Buffers smaller than this stay inside the pickle stream
+MIN_OUT_OF_BAND = 4096
+
+
+def store_path_for(pickle_path):
+    """Default store directory next to a single-file artifact."""
+    return os.path.splitext(pickle_path)[0] + ".models"
+
+
+# path -> ((mtime_ns, size), SHA-256) of the last source pickle hashed
+_source_digests = {}
+
+
+def _file_stamp(path):
+    """Size and SHA-256 of the source pickle; the hash is recomputed only when the file changes."""
+    from .resources import file_digest
+
+    st = os.stat(path)
+    key, signature = os.path.abspath(path), (st.st_mtime_ns, st.st_size)
+    cached = _source_digests.get(key)
+    if cached is None or cached[0] != signature:
+        cached = _source_digests[key] = (signature, file_digest(path))
+    return {"size": st.st_size, "sha256": cached[1]}
+
+
+def convert(pickle_path, out_dir=None):
+    """Split the cloudpickle dict at ``pickle_path`` into a store directory; returns its path."""
+    import cloudpickle
+
+    out_dir = out_dir or store_path_for(pickle_path)
+    with open(pickle_path, 'rb') as f:
+        models = cloudpickle.load(f)
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir)
+    manifest = {"format": FORMAT_VERSION, "source": _file_stamp(pickle_path), "models": {}}
+    for key, model in models.items():
+        stem = re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        buffers = []
+
+        def keep_in_band(buffer):
+            # A false return value sends the buffer out of band
+            if buffer.raw().nbytes < MIN_OUT_OF_BAND:
+                return True
+            buffers.append(buffer)
+            return False
+
+        data = cloudpickle.dumps(model, protocol=5, buffer_callback=keep_in_band)
+        with open(os.path.join(tmp_dir, f"{stem}.pkl"), 'wb') as f:
+            f.write(data)
+
+        layout, bundles = [], []
+        with open(os.path.join(tmp_dir, f"{stem}.bin"), 'wb') as f:
+            for buffer in buffers:
+                raw = buffer.raw()
+                f.write(b"\0" * (-f.tell() % ALIGNMENT))
+                layout.append([f.tell(), raw.nbytes])
+                f.write(raw)
+            for estimator in tree_ensembles(model):
+                node_arrays, depth = bundle_arrays(estimator)
+                arrays = {}
+                for name, array in node_arrays.items():
+                    f.write(b"\0" * (-f.tell() % ALIGNMENT))
+                    arrays[name] = [f.tell(), array.dtype.str, len(array)]
+                    f.write(np.ascontiguousarray(array).tobytes())
+                bundles.append({"depth": int(depth), "arrays": arrays})
+        manifest["models"][key] = {
+            "pickle": f"{stem}.pkl", "buffers": f"{stem}.bin", "layout": layout, "bundles": bundles,
+        }
+
+    with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+
+    if os.path.isdir(out_dir):
+        import shutil
+
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+def _manifest(store_dir):
+    with open(os.path.join(store_dir, MANIFEST), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_current(store_dir, pickle_path):
+    """True if ``store_dir`` was converted from a pickle with the content of ``pickle_path``.
+
+    Content, not modification time, decides, so copies and checkouts of the
+    same pickle keep using the store.
+    """
+    try:
+        manifest = _manifest(store_dir)
+        if manifest.get("format") != FORMAT_VERSION:
+            return False
+        source = manifest.get("source") or {}
+        if source.get("size") != os.path.getsize(pickle_path):
+            return False
+        return source.get("sha256") == _file_stamp(pickle_path)["sha256"]
+    except (OSError, ValueError):
+        return False
+
+
+class ModelStore(Mapping):
+    """Read-only mapping of model key to model, each loaded on first access."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported model store format in {path}; rerun 'python -m erdc convert-models'")
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _load(self, key):
+        entry = self.manifest["models"][key]
+        with open(os.path.join(self.path, entry["pickle"]), 'rb') as f:
+            data = f.read()
+        buffers, mapped = [], None
+        if entry["layout"] or entry["bundles"]:
+            mapped = np.memmap(os.path.join(self.path, entry["buffers"]), dtype=np.uint8, mode='r')
+            buffers = [mapped[offset:offset + nbytes] for offset, nbytes in entry["layout"]]
+        import cloudpickle  # noqa: F401  (registers the reducers the stream refers to)
+
+        model = pickle.loads(data, buffers=buffers)
+        for estimator, bundle in zip(tree_ensembles(model), entry["bundles"]):
+            arrays = {name: np.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
+                      for name, (offset, dtype, count) in bundle["arrays"].items()}
+            use_bundle(estimator, arrays, bundle["depth"])
+        return model
+
+    def __getitem__(self, key):
+        model = self._models.get(key)
+        if model is None:
+            if key not in self.manifest["models"]:
+                raise KeyError(key)
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    with metrics.timed(f"models.load.{key}"):
+                        model = self._models[key] = self._load(key)
+        return model
+
+    def __iter__(self):
+        return iter(self.manifest["models"])
+
+    def __len__(self):
+        return len(self.manifest["models"])
+
+    @property
+    def source_digest(self):
+        """SHA-256 of the pickle this store was converted from (None for stores that predate it)."""
+        return (self.manifest.get("source") or {}).get("sha256")
+
+    def loaded(self):
+        """Keys already deserialized in this process."""
+        return list(self._models)
+
+    def preload(self):
+        """Load every model now (e.g. before forking workers)."""
+        for key in self:
+            self[key]
+        return self
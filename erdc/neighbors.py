@@ -0,0 +1,138 @@
+"""Nearest measured mixes and the applicability domain of the models.
+
+One KD-tree per database sheet is built over standardized feature vectors
+(z-scores per column; ``Fiber Type`` is one-hot encoded so that a different
+fiber counts as one standard deviation rather than by code distance).
+
+A query's *domain distance* is its mean distance to the ``k`` nearest
+measured mixes divided by the same quantity for the database itself (the
+:data:`DOMAIN_QUANTILE` of the leave-one-out values).  Up to 1 the mix lies
+among measured data; above 1 the prediction is an extrapolation.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+from . import metrics
+
+DEFAULT_K = 5
+DOMAIN_QUANTILE = 0.95
+
+# Measured columns of each sheet; every other column is a model input
+SHEET_TARGETS = {
+    "df_C_S": ["Compressive strength"],
+    "df_R": [
+        'Water retetion', 'Dynamic yield stress (Pa)', 'Plastic viscosity (Pa.S)',
+        'Static flocculation stress (Pa)', 'Athix (Pa/min)',
+    ],
+    "df_3D_L": ["Maxmium printing Layers"],
+    "df_3D_S": ["3DP Compressive strength"],
+}
+SHEET_LABELS = {
+    "df_C_S": "Compressive strength",
+    "df_R": "Rheology",
+    "df_3D_L": "3DP layers",
+    "df_3D_S": "3DP strength",
+}
+
+# A fiber mismatch contributes 1 to the distance (two one-hot columns differ)
+_FIBER_WEIGHT = np.sqrt(0.5)
+
+
+class NeighborIndex:
+    """KD-tree over the measured mixes of one sheet."""
+
+    def __init__(self, frame, targets, k=DEFAULT_K, quantile=DOMAIN_QUANTILE):
+        from sklearn.neighbors import KDTree
+
+        self.features = [c for c in frame.columns if c not in targets]
+        self.frame = frame.dropna(subset=self.features).reset_index(drop=True)
+        self._numeric = [i for i, f in enumerate(self.features) if f != 'Fiber Type']
+        self._fiber = self.features.index('Fiber Type') if 'Fiber Type' in self.features else None
+        if self._fiber is not None:
+            self._fiber_codes = np.unique(self.frame['Fiber Type'].to_numpy(float))
+
+        X = self.frame[self.features].to_numpy(float)
+        numeric = X[:, self._numeric]
+        self._mean = numeric.mean(axis=0)
+        std = numeric.std(axis=0)
+        self._scale = np.where(std > 0, std, 1.0)
+
+        points = self._transform(X)
+        self._tree = KDTree(points)
+        self.k = max(1, min(k, len(self.frame) - 1))
+        # Leave-one-out: the nearest neighbour of a database row is itself
+        distances, _ = self._tree.query(points, k=self.k + 1)
+        self.threshold = max(float(np.quantile(distances[:, 1:].mean(axis=1), quantile)), 1e-12)
+
+    def _transform(self, X):
+        parts = [(X[:, self._numeric] - self._mean) / self._scale]
+        if self._fiber is not None:
+            fiber = X[:, self._fiber]
+            parts.append((fiber[:, None] == self._fiber_codes[None, :]) * _FIBER_WEIGHT)
+        return np.hstack(parts)
+
+    def _matrix(self, query, defaults=None):
+        """Feature matrix of one mix (mapping) or a DataFrame of mixes, in index order."""
+        defaults = defaults or {}
+        if isinstance(query, Mapping):
+            source = {**defaults, **query}
+            missing = [f for f in self.features if f not in source]
+            if missing:
+                raise ValueError(f"missing inputs: {', '.join(missing)}")
+            return np.array([[source[f] for f in self.features]], dtype=float)
+        missing = [f for f in self.features if f not in query and f not in defaults]
+        if missing:
+            raise ValueError(f"missing inputs: {', '.join(missing)}")
+        n = len(query)
+        return np.column_stack([
+            query[f].to_numpy(float) if f in query else np.full(n, float(defaults[f]))
+            for f in self.features
+        ]) if n else np.empty((0, len(self.features)))
+
+    def query(self, query, k=None, defaults=None):
+        """``(distances, positions)`` of the ``k`` nearest measured mixes, one row per query mix.
+
+        ``defaults`` fills inputs the query does not carry (e.g. ``{'Age': 28}``).
+        """
+        X = self._matrix(query, defaults)
+        if not len(X):
+            return np.empty((0, k or self.k)), np.empty((0, k or self.k), dtype=int)
+        with metrics.timed("neighbors.query"):
+            return self._tree.query(self._transform(X), k=min(k or self.k, len(self.frame)))
+
+    def domain_distance(self, query, defaults=None):
+        """Mean distance to the ``k`` nearest measured mixes relative to the database (> 1: extrapolation)."""
+        distances, _ = self.query(query, defaults=defaults)
+        return distances.mean(axis=1) / self.threshold
+
+    def nearest(self, mix, k=None, defaults=None):
+        """The ``k`` measured mixes closest to one ``mix``, nearest first, with a ``Distance`` column."""
+        distances, positions = self.query(mix, k, defaults)
+        rows = self.frame.iloc[positions[0]].copy()
+        rows.insert(0, "Distance", distances[0])
+        return rows.reset_index(drop=True)
+
+
+def build_indexes(database, k=DEFAULT_K):
+    """``{sheet: NeighborIndex}`` for the sheets of ``erdc.resources.load_database``."""
+    with metrics.timed("neighbors.build"):
+        return {
+            sheet: NeighborIndex(database[sheet], targets, k)
+            for sheet, targets in SHEET_TARGETS.items() if sheet in database
+        }
+
+
+def domain_columns(indexes, mixes, sheets, defaults=None):
+    """Batched domain distance of ``mixes`` against each of ``sheets``, keyed by column name.
+
+    Adds ``Applicability domain``: ``In domain`` when every distance is at most 1.
+    """
+    columns = {}
+    inside = np.ones(len(mixes), dtype=bool)
+    for sheet in sheets:
+        distance = indexes[sheet].domain_distance(mixes, defaults)
+        columns[f"{SHEET_LABELS[sheet]} domain distance"] = distance
+        inside &= distance <= 1
+    columns["Applicability domain"] = np.where(inside, "In domain", "Extrapolation")
+    return columns
@@ -0,0 +1,477 @@
+"""Mix-design search: the target-strength grid sweep, the constrained Pareto search and
+the 3DP printing-parameter search."""
+import itertools
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .inference import predict_chunked, predict_many
+from .mix import (
+    AGES, compressive_features_list, compressive_thresholds, range_violation,
+    rheology_features_list, rheology_models, rheology_ranges,
+)
+
+
+def _inclusive_range(start, stop, step):
+    """Evenly spaced values from ``start`` to ``stop`` inclusive (unlike ``np.arange``)."""
+    if step <= 0 or stop < start:
+        raise ValueError(f"invalid range: {start}..{stop} step {step}")
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return start + step * np.arange(count)
+
+
+@dataclass
+class GridSpec:
+    """Resolution of the W/B × cement-fraction sweep (cement as a fraction of K)."""
+    wb_min: float = 0.30
+    wb_max: float = 0.50
+    wb_step: float = 0.01
+    cement_min: float = 0.50
+    cement_max: float = 1.00
+    cement_step: float = 0.05
+
+    def wb_values(self):
+        return _inclusive_range(self.wb_min, self.wb_max, self.wb_step)
+
+    def cement_fractions(self):
+        return _inclusive_range(self.cement_min, self.cement_max, self.cement_step)
+
+    @property
+    def size(self):
+        return len(self.wb_values()) * len(self.cement_fractions())
+
+
+def build_strength_grid(base_input, spec, age=28, wb_values=None):
+    """Return every (W/B, cement fraction) candidate as one compressive-model input frame.
+
+    ``base_input`` holds the fixed model keys (limestone, silica fume, Nc, fibers, ...).
+    Cement and SCM share the binder left after limestone and silica fume (K).
+    ``wb_values`` restricts the frame to those W/B rows of the grid.
+    """
+    K = 100 - base_input['Limestone content (%)'] - base_input['Silica fume content (%)']
+    wb_values = spec.wb_values() if wb_values is None else wb_values
+    wb, cement_pct = np.meshgrid(wb_values, spec.cement_fractions(), indexing='ij')
+    wb = wb.ravel()
+    cement = cement_pct.ravel() * K
+
+    columns = {}
+    for feature in compressive_features_list:
+        if feature == 'Cement content (%)':
+            columns[feature] = cement
+        elif feature == 'SCM content (%)':
+            columns[feature] = K - cement
+        elif feature == 'Water/Binder':
+            columns[feature] = wb
+        elif feature == 'Age':
+            columns[feature] = np.full(len(wb), age)
+        else:
+            columns[feature] = np.full(len(wb), base_input[feature])
+    return pd.DataFrame(columns, columns=compressive_features_list)
+
+
+# With a progress callback the grid is scored in about this many steps
+PROGRESS_STEPS = 20
+PROGRESS_MIN_ROWS = 2_000
+# Grids above this many candidates are refused; they are built and scored this many rows at a time
+STRENGTH_MAX_CANDIDATES = 2_000_000
+STRENGTH_SLICE_ROWS = 200_000
+
+
+def _score_grid(model, grid, base_input, surfaces=None, interpolate=False):
+    """Predicted strength of ``grid``: read from ``surfaces`` where they cover it, live otherwise."""
+    predicted = None
+    K = 100 - base_input['Limestone content (%)'] - base_input['Silica fume content (%)']
+    if surfaces is not None and K > 0:
+        with metrics.timed("optimize.surface_lookup"):
+            predicted = surfaces.lookup(
+                base_input,
+                grid['Water/Binder'].to_numpy(),
+                grid['Cement content (%)'].to_numpy() / K,
+                age=28,
+                exact=not interpolate,
+            )
+    if predicted is None:
+        predicted = np.full(len(grid), np.nan)
+    missing = np.isnan(predicted)
+    if missing.any():
+        with metrics.timed("optimize.grid_score"):
+            predicted[missing] = predict_chunked(model, grid[missing], name="stacking_model_C")
+    return predicted
+
+
+def _strength_results(grid, predicted, target_strength):
+    keep = predicted >= target_strength
+    return pd.DataFrame({
+        "Cement content (%)": grid['Cement content (%)'].to_numpy()[keep],
+        "SCM content (%)": grid['SCM content (%)'].to_numpy()[keep].astype(int),
+        "Water/Binder": grid['Water/Binder'].to_numpy()[keep],
+        "Predicted Strength (MPa)": predicted[keep],
+    })
+
+
+def optimize_strength(model, base_input, target_strength, spec=None, progress=None,
+                      surfaces=None, interpolate=False):
+    """Score the whole grid in batched predicts and keep mixes reaching ``target_strength``.
+
+    Grids above :data:`STRENGTH_MAX_CANDIDATES` raise ``ValueError``; the rest
+    is built a block of W/B values at a time, never all at once.
+
+    ``progress(done, total, partial_results)`` is called after each slice of the
+    grid when given; it may raise to abandon the search.  Points on the nodes of
+    ``surfaces`` (an ``erdc.surfaces.SurfaceTable``) are looked up instead; with
+    ``interpolate`` so are points between nodes.  Interpolated strengths are
+    approximate, since the tree ensembles are not smooth between nodes.
+    """
+    spec = spec or GridSpec()
+    n = spec.size
+    if n > STRENGTH_MAX_CANDIDATES:
+        raise ValueError(f"{n:,} candidate mixes exceed the limit of {STRENGTH_MAX_CANDIDATES:,}; use coarser steps")
+
+    # Built and scored a block of whole W/B rows at a time
+    wb_values, per_row = spec.wb_values(), len(spec.cement_fractions())
+    step = max(PROGRESS_MIN_ROWS, -(-n // PROGRESS_STEPS)) if progress is not None else n
+    rows_per_slice = max(1, min(step, STRENGTH_SLICE_ROWS) // per_row)
+    parts = []
+    for start in range(0, len(wb_values), rows_per_slice):
+        with metrics.timed("optimize.grid_build"):
+            part = build_strength_grid(base_input, spec, wb_values=wb_values[start:start + rows_per_slice])
+        predicted = _score_grid(model, part, base_input, surfaces, interpolate)
+        parts.append(_strength_results(part, predicted, target_strength))
+        if progress is not None:
+            progress(min((start + rows_per_slice) * per_row, n), n, parts[-1])
+    return pd.concat(parts, ignore_index=True)
+
+
+# ----------------------
+# Constrained multi-objective search
+# ----------------------
+# Decision variables of the Pareto search and their default bounds.  Cement is
+# expressed as a fraction of K = 100 - limestone - silica fume, SCM fills the rest.
+SEARCH_VARIABLES = {
+    "Cement fraction": (0.50, 1.00),
+    "Water/Binder": (0.30, 0.50),
+    "Limestone content (%)": (0.0, 40.0),
+    "Silica fume content (%)": (0.0, 30.0),
+    "Sand/Binder": (0.0, 2.5),
+}
+
+STRENGTH_COLUMNS = {age: f"Compressive Strength {age}d (MPa)" for age in AGES}
+
+
+@dataclass
+class ParetoResult:
+    """Outcome of :func:`optimize_pareto`."""
+    front: pd.DataFrame
+    evaluated: pd.DataFrame
+    levels: list = field(default_factory=list)   # candidates scored per refinement level
+
+
+def build_mix_frame(base_input, variables, features=None):
+    """Expand decision-variable columns into full model-key rows (without Age).
+
+    ``variables`` maps names from :data:`SEARCH_VARIABLES` to equal-length arrays;
+    anything not searched is taken from ``base_input``.  ``features`` defaults to
+    the compressive and rheology model keys.
+    """
+    n = len(next(iter(variables.values())))
+
+    def column(name):
+        if name in variables:
+            return np.asarray(variables[name], dtype=float)
+        return np.full(n, float(base_input[name]))
+
+    limestone = column('Limestone content (%)')
+    silica_fume = column('Silica fume content (%)')
+    K = 100 - limestone - silica_fume
+    if "Cement fraction" in variables:
+        cement = np.asarray(variables["Cement fraction"], dtype=float) * K
+    else:
+        cement = np.full(n, float(base_input['Cement content (%)']))
+
+    columns = {}
+    for feature in dict.fromkeys(features or compressive_features_list + rheology_features_list):
+        if feature == 'Age':
+            continue
+        if feature == 'Cement content (%)':
+            columns[feature] = cement
+        elif feature == 'SCM content (%)':
+            columns[feature] = K - cement
+        elif feature == 'Limestone content (%)':
+            columns[feature] = limestone
+        elif feature == 'Silica fume content (%)':
+            columns[feature] = silica_fume
+        else:
+            columns[feature] = column(feature)
+    return pd.DataFrame(columns)
+
+
+def evaluate_mixes(models, mixes, fiber_type_num, min_strength=None):
+    """Predict rheology and 7/28-day strength for every mix and score the constraints.
+
+    Adds one column per prediction plus ``Violation`` (0 when every limit is met)
+    and ``Feasible``.
+    """
+    ranges = rheology_ranges(fiber_type_num)
+    thresholds = dict(compressive_thresholds(fiber_type_num))
+    if min_strength is not None:
+        thresholds[28] = max(thresholds.get(28, min_strength), min_strength)
+
+    rheology_df = mixes[rheology_features_list]
+    jobs = [(models[rheology_models[name]], rheology_df) for name in ranges]
+    jobs += [(models['stacking_model_C'], mixes.assign(Age=age)[compressive_features_list]) for age in STRENGTH_COLUMNS]
+    names = [rheology_models[name] for name in ranges] + [f"stacking_model_C.{age}d" for age in STRENGTH_COLUMNS]
+    predictions = iter(predict_many(jobs, names=names))
+
+    result = mixes.copy()
+    violation = np.zeros(len(mixes))
+    for name, (lo, hi) in ranges.items():
+        result[name] = predicted = next(predictions)
+        violation += range_violation(predicted, lo, hi)
+    for age, column in STRENGTH_COLUMNS.items():
+        result[column] = predicted = next(predictions)
+        violation += range_violation(predicted, thresholds.get(age), None)
+
+    result["Violation"] = violation
+    result["Feasible"] = violation == 0
+    return result
+
+
+def pareto_mask(objectives):
+    """Boolean mask of non-dominated rows; every objective column is minimized.
+
+    Of several rows with identical objectives only the first is kept.
+    """
+    objectives = np.asarray(objectives, dtype=float)
+    n = len(objectives)
+    order = np.lexsort(objectives.T[::-1])
+    mask = np.zeros(n, dtype=bool)
+    front = np.empty((0, objectives.shape[1]))
+    for idx in order:
+        point = objectives[idx]
+        if not np.any(np.all(front <= point, axis=1)):
+            mask[idx] = True
+            front = np.vstack([front, point])
+    return mask
+
+
+def _pareto_objectives(frame):
+    # Maximize 28-day strength, minimize cement content
+    return np.column_stack([-frame[STRENGTH_COLUMNS[28]].to_numpy(), frame['Cement content (%)'].to_numpy()])
+
+
+def _lattice(bounds, points):
+    axes = [np.linspace(lo, hi, points) if hi > lo else np.array([lo]) for lo, hi in bounds]
+    return np.array(list(itertools.product(*axes)))
+
+
+def optimize_pareto(models, base_input, space=None, min_strength=None,
+                    levels=4, budget=2000, refine_points=3, max_seeds=32, progress=None):
+    """Search the mix space for the strength vs. cement Pareto front under all pass/fail limits.
+
+    Coarse-to-fine: a lattice of about ``budget`` points covers ``space`` (name ->
+    (low, high), defaulting to cement fraction and W/B), then each level scores a
+    small local lattice around the current front — or around the least-violating
+    mixes while nothing is feasible — with the spacing halved every level.
+
+    ``progress(level, levels + 1, current_front)`` is called after each level
+    when given; it may raise to abandon the search.
+    """
+    with metrics.timed("optimize.pareto"):
+        return _optimize_pareto(models, base_input, space, min_strength, levels, budget,
+                                refine_points, max_seeds, progress)
+
+
+def _front(evaluated):
+    """Feasible, non-dominated rows of ``evaluated`` ordered by cement content."""
+    feasible = evaluated[evaluated["Feasible"]] if len(evaluated) else evaluated
+    if not len(feasible):
+        return feasible
+    front = feasible[pareto_mask(_pareto_objectives(feasible))]
+    return front.sort_values('Cement content (%)').reset_index(drop=True)
+
+
+def _optimize_pareto(models, base_input, space, min_strength, levels, budget, refine_points, max_seeds, progress):
+    space = dict(space or {name: SEARCH_VARIABLES[name] for name in ("Cement fraction", "Water/Binder")})
+    names = list(space)
+    bounds = np.array([space[name] for name in names], dtype=float)
+    if np.any(bounds[:, 1] < bounds[:, 0]):
+        raise ValueError("search bounds must satisfy low <= high")
+    fiber_type_num = base_input.get('Fiber Type', 0)
+
+    active = bounds[:, 1] > bounds[:, 0]
+    points = max(3, int(round(budget ** (1 / max(active.sum(), 1)))))
+    step = np.where(active, (bounds[:, 1] - bounds[:, 0]) / (points - 1), 0.0)
+    candidates = _lattice(bounds, points)
+
+    seen = set()
+    evaluated = []
+    level_sizes = []
+    offsets = _lattice([(-1.0, 1.0)] * len(names), refine_points)
+
+    for level in range(levels + 1):
+        fresh = []
+        for i, row in enumerate(candidates):
+            key = tuple(np.round(row, 9))
+            if key not in seen:
+                seen.add(key)
+                fresh.append(i)
+        candidates = candidates[fresh]
+        level_sizes.append(len(candidates))
+        if len(candidates):
+            scored = evaluate_mixes(
+                models,
+                build_mix_frame(base_input, dict(zip(names, candidates.T))),
+                fiber_type_num,
+                min_strength,
+            )
+            scored[names] = candidates
+            evaluated.append(scored)
+
+        history = pd.concat(evaluated, ignore_index=True) if evaluated else pd.DataFrame()
+        front = _front(history)
+        if progress is not None:
+            progress(level + 1, levels + 1, front)
+        if level == levels:
+            break
+        if len(front):
+            seeds = front
+            # Spread the seeds along the whole front rather than one end of it
+            seeds = seeds.iloc[np.unique(np.linspace(0, len(seeds) - 1, max_seeds).astype(int))]
+        else:
+            seeds = history.nsmallest(max_seeds, "Violation")
+        seeds = seeds[names].to_numpy()
+
+        step = step / 2
+        local = (seeds[:, None, :] + offsets[None, :, :] * step).reshape(-1, len(names))
+        candidates = np.clip(local, bounds[:, 0], bounds[:, 1])
+
+    return ParetoResult(front=front, evaluated=history, levels=level_sizes)
+
+
+# ----------------------
+# 3DP printing parameters
+# ----------------------
+# Documented ranges of the printing parameters and the default grid steps
+PRINTING_RANGES = {
+    'Printing speed (mm/s)': (20.0, 50.0),
+    'nozzle size (mm)': (20.0, 40.0),
+    'single layer height (mm)': (10.0, 25.0),
+}
+PRINTING_STEPS = {
+    'Printing speed (mm/s)': 2.5,
+    'nozzle size (mm)': 2.0,
+    'single layer height (mm)': 1.0,
+}
+LAYERS_COLUMN = "Maximum Printing Layers"
+PRINTED_STRENGTH_COLUMN = "3DP Strength 28d (MPa)"
+
+
+# Grids above this many candidates are refused; they are scored this many rows at a time
+PRINTING_MAX_CANDIDATES = 2_000_000
+PRINTING_SLICE_ROWS = 50_000
+# Best feasible candidates kept in the ranking
+PRINTING_TOP_N = 1_000
+PRINTING_HEATMAP_AXES = ('Printing speed (mm/s)', 'single layer height (mm)')
+
+
+@dataclass
+class PrintingResult:
+    """Outcome of :func:`optimize_printing`."""
+    ranked: pd.DataFrame        # best candidates meeting the strength floor, most layers first (at most top_n)
+    heatmap: pd.DataFrame       # best feasible layers per cell of the two heatmap_axes (NaN: none feasible)
+    candidates: int             # combinations scored
+    feasible: int               # of which meet the strength floor
+    min_strength: float
+    mix_axes: list = field(default_factory=list)    # mix variables searched with the printing parameters
+
+
+def _printing_axes(steps=None, mix_space=None):
+    steps = {**PRINTING_STEPS, **(steps or {})}
+    axes = {name: _inclusive_range(lo, hi, steps[name]) for name, (lo, hi) in PRINTING_RANGES.items()}
+    axes.update({name: np.asarray(values, dtype=float) for name, values in (mix_space or {}).items()})
+    return axes
+
+
+def printing_grid_size(steps=None, mix_space=None):
+    """Number of candidates :func:`optimize_printing` scores for these settings."""
+    return int(np.prod([len(values) for values in _printing_axes(steps, mix_space).values()]))
+
+
+def build_printing_grid(models, base_input, steps=None, mix_space=None, start=0, stop=None):
+    """Printing-parameter combinations (crossed with ``mix_space``) as one model-key frame.
+
+    ``steps`` overrides :data:`PRINTING_STEPS`; ``mix_space`` maps names from
+    :data:`SEARCH_VARIABLES` to the values to try.  ``start``/``stop`` select a
+    slice of the full grid (in meshgrid order) without building the rest.
+    """
+    axes = _printing_axes(steps, mix_space)
+    shape = tuple(len(values) for values in axes.values())
+    stop = int(np.prod(shape)) if stop is None else stop
+    index = np.unravel_index(np.arange(start, stop), shape)
+    mesh = {name: values[i] for (name, values), i in zip(axes.items(), index)}
+    features = list(models["stacking_model_L"].feature_names_in_) + list(models["stacking_model_S"].feature_names_in_)
+    grid = build_mix_frame(base_input, mesh, features)
+    if "Cement fraction" in mesh:
+        grid["Cement fraction"] = mesh["Cement fraction"]
+    return grid
+
+
+def optimize_printing(models, base_input, min_strength=None, steps=None, mix_space=None, progress=None,
+                      top_n=PRINTING_TOP_N, max_candidates=PRINTING_MAX_CANDIDATES,
+                      heatmap_axes=PRINTING_HEATMAP_AXES):
+    """Maximize predicted printable layers subject to a 28-day printed-strength floor.
+
+    Scores the full grid of :data:`PRINTING_RANGES`, optionally crossed with
+    ``mix_space`` (e.g. ``{"Water/Binder": [...], "Cement fraction": [...]}``),
+    in slices of :data:`PRINTING_SLICE_ROWS` with one batched predict per model
+    each.  Only the ``top_n`` best feasible candidates and the heatmap maxima
+    over ``heatmap_axes`` are kept, so memory does not grow with the grid;
+    grids above ``max_candidates`` raise ``ValueError``.  ``min_strength``
+    defaults to the 28-day compressive threshold for the mix's fiber type.
+    ``progress(done, total, ranked_so_far)`` is called after each slice and
+    may raise to abandon the search.
+    """
+    if min_strength is None:
+        min_strength = compressive_thresholds(base_input.get('Fiber Type', 0))[28]
+    total = printing_grid_size(steps, mix_space)
+    if total > max_candidates:
+        raise ValueError(f"{total:,} printing candidates exceed the limit of {max_candidates:,}; use coarser steps")
+    if progress is not None:
+        progress(0, total)
+
+    layer_features = list(models["stacking_model_L"].feature_names_in_)
+    strength_features = list(models["stacking_model_S"].feature_names_in_)
+    sort_columns = [LAYERS_COLUMN, PRINTED_STRENGTH_COLUMN]
+    x, y = heatmap_axes
+    ranked, heat, feasible = None, None, 0
+    with metrics.timed("optimize.printing"):
+        for start in range(0, total, PRINTING_SLICE_ROWS):
+            grid = build_printing_grid(models, base_input, steps, mix_space, start, min(start + PRINTING_SLICE_ROWS, total))
+            layers, strength = predict_many(
+                [(models["stacking_model_L"], grid[layer_features]),
+                 (models["stacking_model_S"], grid.assign(Age=28)[strength_features])],
+                names=["stacking_model_L", "stacking_model_S.28d"],
+            )
+            grid[LAYERS_COLUMN] = layers
+            grid[PRINTED_STRENGTH_COLUMN] = strength
+            grid["Meets strength floor"] = meets = strength >= min_strength
+            feasible += int(meets.sum())
+
+            # Stable sorts keep earlier grid points first among ties, as one sort of the whole grid would
+            candidates = grid[meets] if ranked is None else pd.concat([ranked, grid[meets]], ignore_index=True)
+            ranked = candidates.sort_values(sort_columns, ascending=False, kind="stable").head(top_n).reset_index(drop=True)
+            cells = grid[LAYERS_COLUMN].where(meets).groupby([grid[x], grid[y]]).max()
+            heat = cells if heat is None else pd.concat([heat, cells]).groupby(level=[0, 1]).max()
+            if progress is not None:
+                progress(min(start + PRINTING_SLICE_ROWS, total), total, ranked)
+
+    return PrintingResult(
+        ranked=ranked,
+        heatmap=heat.rename(LAYERS_COLUMN).reset_index(),
+        candidates=total,
+        feasible=feasible,
+        min_strength=min_strength,
+        mix_axes=list(mix_space or {}),
+    )
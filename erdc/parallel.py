@@ -0,0 +1,55 @@
+"""Process-wide worker pool for fanning model predicts out across cores.
+
+scikit-learn's tree and linear-algebra kernels release the GIL, so a thread
+pool gives real parallelism without copying the models into other processes.
+One pool is created lazily per process (and recreated after ``fork``); inputs
+below :data:`MIN_PARALLEL_ROWS` run serially, where the hand-off would cost
+more than it saves.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MIN_PARALLEL_ROWS = 2_000
+MIN_CHUNK_ROWS = 500
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def worker_count():
+    """Cores available to this process (``ERDC_WORKERS`` overrides)."""
+    override = os.environ.get("ERDC_WORKERS")
+    if override:
+        return max(1, int(override))
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_pool():
+    """The shared warm pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=worker_count(), thread_name_prefix="erdc-predict")
+        return _pool
+
+
+def _reset_after_fork():
+    # Threads do not survive fork; the child builds its own pool on demand
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def run(tasks, parallel=True):
+    """Call every zero-argument task, on the pool if ``parallel``; results keep task order."""
+    if not parallel or len(tasks) < 2 or worker_count() < 2:
+        return [task() for task in tasks]
+    return list(get_pool().map(lambda task: task(), tasks))
@@ -0,0 +1,353 @@
+"""Preforking multi-worker serving: load everything once, fork workers that share it.
+
+    python -m erdc prefork streamlit --workers 4   # UI replicas on ports 8501..8504
+    python -m erdc prefork api --workers 4         # API workers on one shared port 8600
+
+The parent loads the models (every model of a split store), compiles their
+fast paths, parses the workbook and builds the neighbour indexes and response
+surfaces, then freezes the garbage collector (``gc.freeze``) so collections in
+the workers never write to, and thereby copy, the inherited objects.  Workers
+find all of it in the ``erdc.resources`` cache and share those pages
+copy-on-write with the parent and each other, so adding a worker costs its
+own heap rather than another copy of the models.
+
+API workers accept on a socket the parent binds once, so the kernel spreads
+connections over them.  Each also answers ``/healthz`` on a loopback port of
+its own (``--health-port`` + 1 + its index), so a stuck worker is seen even
+while its siblings answer on the shared port.  Streamlit workers each get a
+port of their own (``--port`` upwards); put them behind a load balancer with
+sticky sessions.
+
+The parent starts no threads.  It restarts workers that exit and answers
+probes on ``--health-port``::
+
+    GET /healthz   -> 200 while the supervisor runs
+    GET /readyz    -> 200 once preloading is done and every worker answers its own
+                      health endpoint, else 503; lists each worker's pid, port,
+                      RSS and PSS (resident memory with shared pages split
+                      among the processes sharing them; Linux only)
+"""
+import gc
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from . import engine, metrics, parallel, resources
+from .cli import APPS, DEFAULT_HEALTH_PORT, UI_SCRIPT
+from .resources import DATABASE_FILE, MODELS_FILE
+
+DEFAULT_PORTS = {"streamlit": 8501, "api": 8600}
+
+POLL_INTERVAL = 0.5     # supervisor loop period (s)
+RESTART_DELAY = 1.0     # wait before replacing a worker that exited (s)
+PROBE_TIMEOUT = 1.0
+STOP_TIMEOUT = 10.0     # grace period before SIGKILL on shutdown (s)
+
+
+def preload(models_path=MODELS_FILE, database_path=DATABASE_FILE, ui=False):
+    """Load and warm everything the workers read, then freeze it out of the GC; returns seconds taken."""
+    start = time.perf_counter()
+    with metrics.timed("prefork.preload"):
+        models = resources.load_models(models_path)
+        if hasattr(models, "preload"):
+            models.preload()
+        if engine.FAST_PATH:
+            from .fastpath import compile_model
+
+            for model in models.values():
+                compile_model(model)
+        resources.load_surfaces(models_path)
+        if os.path.exists(database_path):
+            resources.load_database(database_path)
+            resources.load_neighbors(database_path)
+        if ui:
+            # Import the UI's heavy modules here too, so their pages are shared
+            import altair  # noqa: F401
+            import streamlit  # noqa: F401
+            from streamlit.web import bootstrap  # noqa: F401
+    gc.collect()
+    gc.freeze()
+    return time.perf_counter() - start
+
+
+def memory(pid):
+    """``{"rss_mb", "pss_mb"}`` of a process from ``/proc/<pid>/smaps_rollup``, or None if unavailable."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0])
+    except (OSError, ValueError):
+        return None
+    if len(values) < 2:
+        return None
+    return {"rss_mb": round(values["Rss"] / 1024, 1), "pss_mb": round(values["Pss"] / 1024, 1)}
+
+
+def _probe(url):
+    try:
+        with urllib.request.urlopen(url, timeout=PROBE_TIMEOUT) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+class _Worker:
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.pid = None
+        self.exited = None
+        self.restarts = 0
+        self.probe_server = None    # API workers: loopback server for this worker's /healthz
+
+
+class Supervisor:
+    """Fork ``workers`` copies of ``app`` from the preloaded parent and keep them running."""
+
+    def __init__(self, app="streamlit", workers=None, host="127.0.0.1", port=None,
+                 health_port=DEFAULT_HEALTH_PORT, models_path=MODELS_FILE, database_path=DATABASE_FILE,
+                 script=UI_SCRIPT, window=None, max_batch=None):
+        if app not in APPS:
+            raise ValueError(f"unknown app {app!r}; expected one of {', '.join(APPS)}")
+        if not hasattr(os, "fork"):
+            raise ValueError("prefork needs os.fork (Linux or macOS); run 'serve' or streamlit directly instead")
+        if app == "streamlit" and not os.path.exists(script):
+            raise FileNotFoundError(f"Streamlit script not found: {script}")
+        self.app = app
+        self.host = host
+        self.port = DEFAULT_PORTS[app] if port is None else port
+        self.health_port = health_port
+        self.models_path = models_path
+        self.database_path = database_path
+        self.script = script
+        self.window = window
+        self.max_batch = max_batch
+        count = workers or parallel.worker_count()
+        self.workers = [_Worker(i, self.port if app == "api" else self.port + i) for i in range(count)]
+        # Split the cores between workers so their predict pools do not oversubscribe
+        self.threads_per_worker = max(1, parallel.worker_count() // count)
+        self.preload_seconds = None
+        self.api_server = None
+        self.health_server = None
+        self._stopping = False
+
+    # ----------------------
+    # Workers
+    # ----------------------
+    def _spawn(self, worker):
+        pid = os.fork()
+        if pid:
+            worker.pid = pid
+            return
+        # Child: never return into the supervisor loop
+        code = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            self.health_server.server_close()
+            for other in self.workers:
+                if other is not worker and other.probe_server is not None:
+                    other.probe_server.server_close()
+            os.environ.setdefault("ERDC_WORKERS", str(self.threads_per_worker))
+            if self.app == "api":
+                self._run_api(worker)
+            else:
+                self._run_streamlit(worker.port)
+            code = 0
+        except KeyboardInterrupt:
+            code = 0
+        except BaseException as exc:
+            print(f"worker {worker.index} (pid {os.getpid()}) failed: {exc!r}", file=sys.stderr, flush=True)
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _run_api(self, worker):
+        from .server import DEFAULT_MAX_BATCH, DEFAULT_WINDOW, InferenceService
+
+        # Batcher threads are started here: threads do not survive fork
+        service = InferenceService(
+            engine.load(self.models_path),
+            DEFAULT_WINDOW if self.window is None else self.window,
+            DEFAULT_MAX_BATCH if self.max_batch is None else self.max_batch,
+        )
+        self.api_server.service = service
+        worker.probe_server.service = service
+        threading.Thread(target=worker.probe_server.serve_forever, name="erdc-worker-health", daemon=True).start()
+        try:
+            self.api_server.serve_forever()
+        finally:
+            service.close()
+
+    def _run_streamlit(self, port):
+        from streamlit.web import bootstrap
+
+        bootstrap.run(self.script, False, [], {
+            "server.port": port,
+            "server.address": self.host,
+            "server.headless": True,
+            # Reloading erdc modules would drop the shared, preloaded objects
+            "server.fileWatcherType": "none",
+        })
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            for worker in self.workers:
+                if worker.pid == pid:
+                    if not self._stopping:
+                        print(f"worker {worker.index} (pid {pid}) exited with status "
+                              f"{os.waitstatus_to_exitcode(status)}; restarting", file=sys.stderr, flush=True)
+                    worker.pid = None
+                    worker.exited = time.monotonic()
+
+    def _respawn(self):
+        for worker in self.workers:
+            if worker.pid is None and time.monotonic() - worker.exited >= RESTART_DELAY:
+                worker.restarts += 1
+                self._spawn(worker)
+
+    def _stop_workers(self):
+        self._stopping = True
+        live = [w for w in self.workers if w.pid]
+        for worker in live:
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while any(w.pid for w in live) and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for worker in live:
+            if worker.pid:
+                try:
+                    os.kill(worker.pid, signal.SIGKILL)
+                    os.waitpid(worker.pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
+                worker.pid = None
+
+    # ----------------------
+    # Health
+    # ----------------------
+    def _probe_host(self):
+        return "127.0.0.1" if self.host in ("", "0.0.0.0", "::") else self.host
+
+    def status(self):
+        """Readiness of the deployment plus each worker's memory, as served on ``/readyz``."""
+        host = self._probe_host()
+        workers = []
+        for worker in self.workers:
+            alive = worker.pid is not None
+            if self.app == "api":
+                # Each worker's own loopback port; the shared one is answered by any of them
+                health_port = worker.probe_server.server_address[1]
+                ready = alive and _probe(f"http://127.0.0.1:{health_port}/healthz")
+            else:
+                health_port = worker.port
+                ready = alive and _probe(f"http://{host}:{worker.port}/_stcore/health")
+            workers.append({
+                "index": worker.index, "pid": worker.pid, "port": worker.port, "health_port": health_port,
+                "ready": ready, "restarts": worker.restarts, "memory": memory(worker.pid) if alive else None,
+            })
+        return {
+            "ready": self.preload_seconds is not None and all(w["ready"] for w in workers),
+            "app": self.app,
+            "preload_seconds": self.preload_seconds,
+            "parent": {"pid": os.getpid(), "memory": memory(os.getpid())},
+            "workers": workers,
+        }
+
+    # ----------------------
+    # Main loop
+    # ----------------------
+    def _on_signal(self, signum, frame):
+        self._stopping = True
+
+    def run(self):
+        """Preload, fork the workers and supervise them until SIGTERM or SIGINT."""
+        self.health_server = _HealthServer((self.host, self.health_port), self)
+        self.health_server.timeout = POLL_INTERVAL
+        print(f"health checks on http://{self._probe_host()}:{self.health_server.server_address[1]}/readyz",
+              flush=True)
+        self.preload_seconds = round(preload(self.models_path, self.database_path, ui=self.app == "streamlit"), 2)
+        print(f"preloaded models and database in {self.preload_seconds} s", flush=True)
+
+        if self.app == "api":
+            from .server import InferenceServer
+
+            # Bound once here; every worker accepts on the inherited socket
+            self.api_server = InferenceServer((self.host, self.port), None)
+            for worker in self.workers:
+                port = self.health_port and self.health_port + 1 + worker.index
+                worker.probe_server = InferenceServer(("127.0.0.1", port), None)
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for worker in self.workers:
+            self._spawn(worker)
+        ports = str(self.port) if self.app == "api" else f"{self.port}-{self.workers[-1].port}"
+        print(f"{len(self.workers)} {self.app} workers on http://{self.host}:{ports}", flush=True)
+
+        try:
+            while not self._stopping:
+                self.health_server.handle_request()
+                self._reap()
+                if not self._stopping:
+                    self._respawn()
+        finally:
+            self._stop_workers()
+            self.health_server.server_close()
+            if self.api_server is not None:
+                self.api_server.server_close()
+            for worker in self.workers:
+                if worker.probe_server is not None:
+                    worker.probe_server.server_close()
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/readyz":
+            status = self.server.supervisor.status()
+            self._send(200 if status["ready"] else 503, status)
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HealthServer(HTTPServer):
+    # Single-threaded on purpose: the supervisor must not own threads when it forks
+    def __init__(self, address, supervisor):
+        super().__init__(address, _HealthHandler)
+        self.supervisor = supervisor
+
+
+def run(app="streamlit", **kwargs):
+    """Build a :class:`Supervisor` and run it until interrupted."""
+    Supervisor(app, **kwargs).run()
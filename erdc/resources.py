@@ -0,0 +1,247 @@
+"""Process-wide loading of the experimental workbook and the trained models.
+
+Streamlit re-executes ``UI-streamlit.py`` on every widget change, but imported
+modules live as long as the server process.  Anything cached here is therefore
+parsed once and shared by every session instead of once per rerun.
+
+Each cached file is checked by ``(mtime, size)`` on every call; when that
+changes the file is re-hashed and only reloaded if its content really changed.
+The workbook is additionally mirrored to Parquet files under ``.cache/`` so a
+fresh process can skip openpyxl entirely while the workbook is unchanged.
+
+Returned objects are shared between sessions and must be treated as read-only.
+"""
+import hashlib
+import os
+import shutil
+import threading
+
+from . import metrics
+
+DATABASE_FILE = '3D-DB-Nov-2025.xlsx'
+MODELS_FILE = '3DP_November_2025.pkl'
+CACHE_DIR = '.cache'
+
+# Workbook sheets used by the app, by position (sheet titles carry stray spaces)
+DATABASE_SHEETS = {
+    "df_C_S": 0,    # Compressive strength
+    "df_R": 1,      # Rheology
+    "df_3D_L": 2,   # 3DP layer
+    "df_3D_S": 3,   # 3DP strength
+}
+
+_lock = threading.RLock()
+_entries = {}
+
+
+class _Entry:
+    __slots__ = ("signature", "digest", "value")
+
+    def __init__(self, signature, digest, value):
+        self.signature = signature
+        self.digest = digest
+        self.value = value
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's content."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _stat_signature(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached(kind, path, loader):
+    """Return ``loader(path, digest)``, reusing the last result while the file is unchanged."""
+    path = os.path.abspath(path)
+    signature = _stat_signature(path)
+    key = (kind, path)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry.signature == signature:
+            return entry.value
+        digest = file_digest(path)
+        if entry is not None and entry.digest == digest:
+            # Touched but not modified: keep the loaded object
+            entry.signature = signature
+            return entry.value
+        value = loader(path, digest)
+        _entries[key] = _Entry(signature, digest, value)
+        return value
+
+
+def cached_digest(kind, path):
+    """Digest of the content currently loaded for ``path``, or None if not loaded."""
+    entry = _entries.get((kind, os.path.abspath(path)))
+    return entry.digest if entry is not None else None
+
+
+def clear():
+    """Drop every cached resource (the on-disk workbook mirror is kept)."""
+    with _lock:
+        _entries.clear()
+
+
+# ----------------------
+# Workbook
+# ----------------------
+def _sheet_cache_dir(path, digest):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), CACHE_DIR, f"{stem}-{digest[:16]}")
+
+
+def _read_sheet_cache(cache_dir):
+    import pandas as pd
+
+    paths = {name: os.path.join(cache_dir, f"{name}.parquet") for name in DATABASE_SHEETS}
+    if not all(os.path.exists(p) for p in paths.values()):
+        return None
+    try:
+        with metrics.timed("workbook.cache_read"):
+            return {name: pd.read_parquet(p) for name, p in paths.items()}
+    except (ImportError, ValueError, OSError):
+        return None
+
+
+def _write_sheet_cache(path, cache_dir, frames):
+    """Best effort: a missing Parquet engine or unwritable directory only costs speed."""
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    try:
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name, df in frames.items():
+            df.to_parquet(os.path.join(tmp_dir, f"{name}.parquet"), index=False)
+        os.replace(tmp_dir, cache_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    # Remove mirrors of older workbook versions
+    parent = os.path.dirname(cache_dir)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for entry in os.listdir(parent):
+        full = os.path.join(parent, entry)
+        if entry.startswith(f"{stem}-") and full != cache_dir:
+            shutil.rmtree(full, ignore_errors=True)
+
+
+def _load_database(path, digest):
+    import pandas as pd
+
+    cache_dir = _sheet_cache_dir(path, digest)
+    frames = _read_sheet_cache(cache_dir)
+    if frames is not None:
+        return frames
+
+    # One openpyxl pass for all sheets instead of one per sheet
+    with metrics.timed("workbook.parse"):
+        sheets = pd.read_excel(path, sheet_name=list(DATABASE_SHEETS.values()), engine='openpyxl')
+    frames = {name: sheets[idx] for name, idx in DATABASE_SHEETS.items()}
+    if not os.path.isdir(cache_dir):
+        _write_sheet_cache(path, cache_dir, frames)
+    return frames
+
+
+def load_database(path=DATABASE_FILE):
+    """Return the database sheets as ``{"df_C_S", "df_R", "df_3D_L", "df_3D_S"}`` DataFrames."""
+    return _cached("database", path, _load_database)
+
+
+# ----------------------
+# Models
+# ----------------------
+def _load_models(path, digest):
+    import cloudpickle
+
+    with metrics.timed("models.load"), open(path, 'rb') as f:
+        return cloudpickle.load(f)
+
+
+def _load_model_store(manifest_path, digest):
+    from .model_store import ModelStore
+
+    return ModelStore(os.path.dirname(manifest_path))
+
+
+def _resolve_models(path):
+    """Return ``(kind, file)`` for the artifact to load.
+
+    ``path`` may be the single cloudpickle file or a split model store
+    directory.  A store converted from the current pickle (or shipped without
+    it) is preferred, since it loads each model only on first use.
+    """
+    from .model_store import MANIFEST, is_current, store_path_for
+
+    if os.path.isdir(path):
+        return "model_store", os.path.join(path, MANIFEST)
+    store = store_path_for(path)
+    manifest = os.path.join(store, MANIFEST)
+    if os.path.exists(manifest) and (not os.path.exists(path) or is_current(store, path)):
+        return "model_store", manifest
+    return "models", path
+
+
+def load_models(path=MODELS_FILE):
+    """Return the trained models as a ``{key: model}`` mapping.
+
+    This is the dict from the cloudpickle artifact, or a lazily loading
+    ``ModelStore`` when a split store is available (see ``erdc.model_store``).
+    """
+    kind, file = _resolve_models(path)
+    loader = _load_model_store if kind == "model_store" else _load_models
+    return _cached(kind, file, loader)
+
+
+def models_digest(path=MODELS_FILE):
+    """SHA-256 of the model pickle, loading the models if needed.
+
+    A split store reports the pickle it was converted from, so the same models
+    have the same digest whether or not ``convert-models`` has been run.
+    """
+    models = load_models(path)
+    digest = getattr(models, "source_digest", None)
+    return digest or cached_digest(*_resolve_models(path))
+
+
+def _load_neighbors(path, digest):
+    from .neighbors import build_indexes
+
+    return build_indexes(load_database(path))
+
+
+def load_neighbors(path=DATABASE_FILE):
+    """Nearest-neighbour indexes over the workbook sheets (``erdc.neighbors``), built once per content."""
+    return _cached("neighbors", path, _load_neighbors)
+
+
+# ----------------------
+# Response surfaces
+# ----------------------
+def _load_surfaces(path, digest):
+    from .surfaces import SurfaceTable
+
+    with metrics.timed("surfaces.load"):
+        return SurfaceTable.load(path)
+
+
+def load_surfaces(models_path=MODELS_FILE, path=None):
+    """Precomputed response surfaces for the models at ``models_path``, or None.
+
+    None also when the table was scored with a different model artifact than
+    the one ``models_path`` resolves to now, so a stale table is never used.
+    """
+    from .surfaces import surfaces_path_for
+
+    path = path or surfaces_path_for(models_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = _cached("surfaces", path, _load_surfaces)
+    except (OSError, ValueError, KeyError):
+        return None
+    return table if table.models_digest == models_digest(models_path) else None
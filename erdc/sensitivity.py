@@ -0,0 +1,126 @@
+"""Two-input sensitivity sweeps: any model scored over a 2-D grid in one batched predict.
+
+Every other input is held at the base mix.  The SCM oxides may be swept in
+place of ``Nc``, which is then recomputed for the whole grid at once.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+from .inference import predict_chunked
+from .mix import (
+    compressive_features_list, compressive_thresholds, compute_nc, extra_features,
+    rheology_features_list, rheology_models, rheology_pass, strength_pass,
+)
+
+# Target (display name) -> model key
+TARGETS = {
+    **rheology_models,
+    "Compressive Strength (MPa)": "stacking_model_C",
+    "Maximum Printing Layers": "stacking_model_L",
+    "3DP Strength (MPa)": "stacking_model_S",
+}
+
+# Default sweep range of each input (the documented non-fiber ranges)
+INPUT_RANGES = {
+    'Cement content (%)': (40.0, 100.0),
+    'Limestone content (%)': (0.0, 40.0),
+    'Silica fume content (%)': (0.0, 30.0),
+    'SCM content (%)': (0.0, 60.0),
+    'SSA of SCM (m2/g)': (0.0, 14.0),
+    'CaO in SCM': (0.0, 65.0),
+    'Al2O3 in SCM': (5.0, 35.0),
+    'SiO2 in SCM': (15.0, 75.0),
+    'Water/Binder': (0.2, 0.5),
+    'Sand/Binder': (0.0, 2.5),
+    'Aggregate/Binder': (0.0, 0.5),
+    'Fiber length (mm)': (0.0, 50.0),
+    'Fiber Volume (%)': (0.0, 2.0),
+    'Fiber Type': (0, 5),
+    'Mini-slump after joint': (175.0, 245.0),
+    'Printing speed (mm/s)': (20.0, 50.0),
+    'nozzle size (mm)': (20.0, 40.0),
+    'single layer height (mm)': (10.0, 25.0),
+}
+# Swept as whole codes rather than a continuous range
+DISCRETE_INPUTS = ('Fiber Type',)
+
+
+@dataclass
+class SensitivityResult:
+    """Outcome of :func:`sweep`: one row per grid point."""
+    grid: pd.DataFrame      # x, y, the prediction and (where limits exist) "Status"
+    x: str
+    y: str
+    target: str
+
+
+def target_features(models, target):
+    """Model inputs of ``target``, in the model's order."""
+    key = TARGETS[target]
+    if key == "stacking_model_C":
+        return list(compressive_features_list)
+    if key in ("stacking_model_L", "stacking_model_S"):
+        return list(models[key].feature_names_in_)
+    return list(rheology_features_list)
+
+
+def sweepable_inputs(models, target):
+    """Inputs that can be put on an axis for ``target`` (``Nc`` is replaced by the oxides)."""
+    features = [f for f in target_features(models, target) if f != 'Age']
+    if 'Nc' in features:
+        features.remove('Nc')
+        features += list(extra_features)
+    return features
+
+
+def axis_values(name, low, high, points):
+    """``points`` evenly spaced values from ``low`` to ``high`` (every code for discrete inputs)."""
+    if name in DISCRETE_INPUTS:
+        return np.arange(int(low), int(high) + 1, dtype=float)
+    if high <= low:
+        raise ValueError(f"{name}: range must satisfy low < high")
+    return np.linspace(low, high, int(points))
+
+
+def sweep(models, base_input, target, x, y, x_values, y_values, age=28):
+    """Score ``target`` on the ``x`` × ``y`` grid, every other input from ``base_input``.
+
+    ``age`` applies to the strength targets.  Pass/fail uses the rheology and
+    compressive-strength limits of :mod:`erdc.mix` (none exist for layers).
+    """
+    if x == y:
+        raise ValueError("pick two different inputs")
+    key = TARGETS[target]
+    features = target_features(models, target)
+
+    xs, ys = (a.ravel() for a in np.meshgrid(np.asarray(x_values, float), np.asarray(y_values, float), indexing='ij'))
+    n = len(xs)
+    columns = {name: np.full(n, float(value)) for name, value in base_input.items()
+               if isinstance(value, (int, float, np.number))}
+    columns[x] = xs
+    columns[y] = ys
+    columns['Age'] = np.full(n, float(age))
+    if x in extra_features or y in extra_features:
+        missing = [name for name in extra_features if name not in columns]
+        if missing:
+            raise ValueError(f"sweeping an SCM oxide needs the others too: missing {', '.join(missing)}")
+        # Vectorized over the grid instead of once per point
+        columns['Nc'] = compute_nc(*(columns[name] for name in extra_features))
+    missing = [f for f in features if f not in columns]
+    if missing:
+        raise ValueError(f"missing inputs: {', '.join(missing)}")
+
+    frame = pd.DataFrame({f: columns[f] for f in features}, columns=features)
+    with metrics.timed("sensitivity.sweep"):
+        predicted = predict_chunked(models[key], frame, name=key)
+
+    grid = pd.DataFrame({x: xs, y: ys, target: predicted})
+    fiber = columns['Fiber Type']
+    if target in rheology_models:
+        grid["Status"] = np.where(rheology_pass(target, predicted, fiber), "PASS", "Fail")
+    elif key in ("stacking_model_C", "stacking_model_S") and age in compressive_thresholds(0):
+        grid["Status"] = np.where(strength_pass(age, predicted, fiber), "PASS", "Fail")
+    return SensitivityResult(grid=grid, x=x, y=y, target=target)
@@ -0,0 +1,267 @@
+"""Local HTTP inference service with request micro-batching.
+
+    python -m erdc serve --port 8600
+
+Endpoints (JSON in, JSON out; the body is one mix as accepted by
+``engine.prepare_mix``)::
+
+    POST /predict/rheology      -> {"Water Retention": ..., ...}
+    POST /predict/compressive   -> {"7": ..., "28": ...}      ("ages" optional, a subset of engine.AGES)
+    POST /predict/layer         -> {"max_layers": ...}          (needs printing parameters)
+    POST /predict/strength      -> {"7": ..., "28": ...}        (needs printing parameters)
+    GET  /healthz
+    GET  /metrics               -> Prometheus text (stage timings need ERDC_METRICS=1)
+
+Each model has one :class:`MicroBatcher`.  Rows submitted by concurrent
+requests within ``window`` seconds are stacked and scored with a single
+``predict`` call, which costs little more than scoring one row.  Non-finite
+inputs are rejected before they are queued, and a batch that fails is scored
+request by request so that only the request at fault gets the error.
+"""
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from . import engine, metrics
+from .mix import compressive_features_list, rheology_features_list, rheology_models
+from .resources import MODELS_FILE
+
+DEFAULT_WINDOW = 0.005
+DEFAULT_MAX_BATCH = 1024
+REQUEST_TIMEOUT = 60.0
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-row predicts on one model into batched calls."""
+
+    def __init__(self, model, features, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, name="model"):
+        self.name = name
+        self.model = model
+        self.features = list(features)
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{id(self):x}", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue ``rows`` (lists ordered like ``features``); the Future resolves to their predictions.
+
+        Raises ``ValueError`` for non-finite inputs, which would fail the whole batch.
+        """
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(self.features))
+        bad = ~np.isfinite(rows).all(axis=0)
+        if bad.any():
+            names = [f for f, b in zip(self.features, bad) if b]
+            raise ValueError(f"inputs must be finite numbers: {', '.join(names)}")
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        count = len(first[0])
+        deadline = time.monotonic() + self.window
+        while count < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)   # let the main loop see the stop marker
+                break
+            batch.append(item)
+            count += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = self._collect(item)
+            batch = [(rows, future) for rows, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                predicted = self._score(np.vstack([rows for rows, _ in batch]))
+            except Exception as exc:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(exc)
+                    continue
+                # Score each request alone so only the one at fault gets the error
+                for rows, future in batch:
+                    try:
+                        future.set_result(self._score(rows))
+                    except Exception as exc:
+                        future.set_exception(exc)
+                continue
+            start = 0
+            for rows, future in batch:
+                future.set_result(predicted[start:start + len(rows)])
+                start += len(rows)
+
+    def _score(self, rows):
+        frame = pd.DataFrame(rows, columns=self.features)
+        with metrics.timed(f"serve.predict.{self.name}"):
+            predicted = np.asarray(self.model.predict(frame), dtype=float)
+        self.batches += 1
+        self.rows += len(predicted)
+        return predicted
+
+
+class InferenceService:
+    """Models loaded once plus one micro-batcher per model."""
+
+    def __init__(self, models, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.models = models
+        features = {key: rheology_features_list for key in rheology_models.values()}
+        features['stacking_model_C'] = compressive_features_list
+        features['stacking_model_L'] = models['stacking_model_L'].feature_names_in_
+        features['stacking_model_S'] = models['stacking_model_S'].feature_names_in_
+        self.batchers = {
+            key: MicroBatcher(models[key], cols, window, max_batch, name=key) for key, cols in features.items()
+        }
+
+    def close(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+
+    def _predict(self, key, mixes):
+        batcher = self.batchers[key]
+        missing = [f for f in batcher.features if f not in mixes[0]]
+        if missing:
+            raise ValueError(f"missing inputs: {', '.join(missing)}")
+        rows = [[mix[f] for f in batcher.features] for mix in mixes]
+        return batcher.submit(rows)
+
+    def rheology(self, mix):
+        mix = engine.prepare_mix(mix)
+        futures = {name: self._predict(key, [mix]) for name, key in rheology_models.items()}
+        return {name: float(f.result(REQUEST_TIMEOUT)[0]) for name, f in futures.items()}
+
+    def _by_age(self, key, mix, ages):
+        if not isinstance(ages, (list, tuple)) or not ages or any(a not in engine.AGES for a in ages):
+            raise ValueError(f"'ages' must be a non-empty list of ages in {list(engine.AGES)}, got {ages!r}")
+        mix = engine.prepare_mix(mix)
+        ages = [int(a) for a in ages]
+        values = self._predict(key, [{**mix, 'Age': age} for age in ages]).result(REQUEST_TIMEOUT)
+        return {str(age): float(v) for age, v in zip(ages, values)}
+
+    def compressive(self, mix):
+        return self._by_age('stacking_model_C', mix, mix.get('ages', engine.AGES))
+
+    def layer(self, mix):
+        mix = engine.prepare_mix(mix)
+        return {"max_layers": float(self._predict('stacking_model_L', [mix]).result(REQUEST_TIMEOUT)[0])}
+
+    def strength(self, mix):
+        return self._by_age('stacking_model_S', mix, mix.get('ages', engine.AGES))
+
+    def stats(self):
+        return {key: {"batches": b.batches, "rows": b.rows} for key, b in self.batchers.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    routes = {
+        "/predict/rheology": "rheology",
+        "/predict/compressive": "compressive",
+        "/predict/layer": "layer",
+        "/predict/strength": "strength",
+    }
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send(200, {"status": "ok", "batchers": self.server.service.stats()})
+        elif self.path == "/metrics":
+            gauges = {}
+            for key, stat in self.server.service.stats().items():
+                gauges[f'erdc_batcher_batches_total{{model="{key}"}}'] = stat["batches"]
+                gauges[f'erdc_batcher_rows_total{{model="{key}"}}'] = stat["rows"]
+            body = metrics.prometheus_text(gauges).encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        method = self.routes.get(self.path)
+        if method is None:
+            self._send(404, {"error": f"unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            mix = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(mix, dict):
+                raise ValueError("request body must be a JSON object")
+            result = getattr(self.server.service, method)(mix)
+        except KeyError as exc:
+            self._send(400, {"error": f"unknown key {exc}"})
+        except (ValueError, TypeError) as exc:
+            self._send(400, {"error": str(exc)})
+        except Exception as exc:
+            self._send(500, {"error": str(exc)})
+        else:
+            self._send(200, result)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class InferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.verbose = verbose
+
+    def handle_error(self, request, client_address):
+        # A client that hung up before the reply (e.g. a timed-out probe) is not a server error
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(host="127.0.0.1", port=8600, models_path=MODELS_FILE,
+          window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH, verbose=False):
+    """Load the models and serve until interrupted."""
+    service = InferenceService(engine.load(models_path), window, max_batch)
+    server = InferenceServer((host, port), service, verbose)
+    print(f"serving on http://{host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,226 @@
+"""Precomputed compressive-strength response surfaces for the optimizer.
+
+The target-strength sweep covers almost the same space on every click: W/B
+0.30–0.50 and cement 50–100% of K for one of the ``scm_defaults`` entries and
+one fiber type.  ``python -m erdc precompute-surfaces`` scores that space once
+per (SCM type, fiber type, limestone, silica fume) and stores it next to the
+model artifact::
+
+    3DP_November_2025.surfaces.npz
+        strength        float64 [scm, fiber, limestone, silica fume, age, W/B, cement]
+        <axis>          node values of every axis
+        scm_inputs      SSA and Nc of each SCM type (what the model sees of it)
+        reference_*     the remaining inputs the table was scored with
+        models_digest   SHA-256 of the model pickle the table was scored with
+
+A query is covered when its SCM matches a table row, its fiber type and age
+are on the table and its remaining inputs equal the reference.  Strength is
+then read off the nodes, or interpolated multilinearly over limestone, silica
+fume, W/B and cement between them; everything else is predicted live.  A table
+scored with other models is ignored (see ``erdc.resources.load_surfaces``).
+"""
+import itertools
+import os
+
+import numpy as np
+
+from . import metrics
+from .mix import AGES, compressive_features_list, compute_nc, fiber_type_options, scm_defaults
+
+FORMAT_VERSION = 2
+
+# Node values of the continuous axes; the default GridSpec steps land on nodes
+LIMESTONE = (0.0, 10.0, 20.0, 30.0, 40.0)
+SILICA_FUME = (0.0, 10.0, 20.0, 30.0)
+WATER_BINDER = tuple(np.round(np.linspace(0.30, 0.50, 41), 6))
+CEMENT_FRACTION = tuple(np.round(np.linspace(0.50, 1.00, 41), 6))
+
+# Inputs held fixed across the table (UI defaults unless overridden)
+REFERENCE_FEATURES = ('Sand/Binder', 'Aggregate/Binder', 'Fiber length (mm)', 'Fiber Volume (%)')
+SCM_FEATURES = ('SSA of SCM (m2/g)', 'Nc')
+
+# Interpolation weights this close to a node are snapped to it (exact lookup)
+SNAP = 1e-9
+MATCH_TOLERANCE = 1e-6
+
+
+def surfaces_path_for(models_path):
+    """Default table file next to a model artifact (pickle or store directory)."""
+    return os.path.splitext(os.path.normpath(models_path))[0] + ".surfaces.npz"
+
+
+def _axis_weights(axis, x):
+    """Lower node index, upper-node weight and an inside mask for each value of ``x``."""
+    x = np.asarray(x, dtype=float)
+    inside = (x >= axis[0] - SNAP) & (x <= axis[-1] + SNAP)
+    idx = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+    weight = np.clip((x - axis[idx]) / (axis[idx + 1] - axis[idx]), 0.0, 1.0)
+    weight = np.where(weight < SNAP, 0.0, np.where(weight > 1 - SNAP, 1.0, weight))
+    return idx, weight, inside
+
+
+class SurfaceTable:
+    """Scored strength grid for one model artifact; see the module docstring."""
+
+    def __init__(self, strength, axes, scm_names, scm_inputs, reference, models_digest):
+        self.strength = strength
+        self.axes = {name: np.asarray(values, dtype=float) for name, values in axes.items()}
+        self.scm_names = list(scm_names)
+        self.scm_inputs = np.asarray(scm_inputs, dtype=float)
+        self.reference = dict(reference)
+        self.models_digest = models_digest
+
+    @property
+    def size(self):
+        return self.strength.size
+
+    def save(self, path):
+        """Write the table atomically as a compressed ``.npz``."""
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez_compressed(
+            tmp,
+            format=np.array(FORMAT_VERSION),
+            strength=self.strength,
+            **{f"axis_{name}": values for name, values in self.axes.items()},
+            scm_names=np.array(self.scm_names),
+            scm_inputs=self.scm_inputs,
+            reference_names=np.array(list(self.reference)),
+            reference_values=np.array(list(self.reference.values()), dtype=float),
+            models_digest=np.array(self.models_digest),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported surface table format {int(data['format'])}")
+            axes = {key[len("axis_"):]: data[key] for key in data.files if key.startswith("axis_")}
+            return cls(
+                strength=data["strength"],
+                axes=axes,
+                scm_names=data["scm_names"].tolist(),
+                scm_inputs=data["scm_inputs"],
+                reference=dict(zip(data["reference_names"].tolist(), data["reference_values"].tolist())),
+                models_digest=str(data["models_digest"]),
+            )
+
+    def _surface(self, mix, age):
+        """The (limestone, silica fume, W/B, cement) block covering ``mix``, or None."""
+        scm = np.flatnonzero(np.all(
+            np.abs(self.scm_inputs - [mix[f] for f in SCM_FEATURES]) <= MATCH_TOLERANCE, axis=1))
+        fiber = np.flatnonzero(self.axes["fiber_type"] == mix['Fiber Type'])
+        ages = np.flatnonzero(self.axes["age"] == age)
+        if not (len(scm) and len(fiber) and len(ages)):
+            return None
+        if any(abs(mix[f] - value) > MATCH_TOLERANCE for f, value in self.reference.items()):
+            return None
+        return self.strength[scm[0], fiber[0], :, :, ages[0]]
+
+    def lookup_mix(self, mix, age, exact=True):
+        """Strength of one complete mix at ``age``, or None when the table does not cover it.
+
+        Cement and SCM must fill the binder left by limestone and silica fume,
+        as on the table.  Only nodes are answered by default, so single-mix
+        results match the model.
+        """
+        K = 100 - mix['Limestone content (%)'] - mix['Silica fume content (%)']
+        if K <= 0 or abs(mix['Cement content (%)'] + mix['SCM content (%)'] - K) > MATCH_TOLERANCE:
+            return None
+        value = self.lookup(mix, [mix['Water/Binder']], [mix['Cement content (%)'] / K], age, exact)[0]
+        return None if np.isnan(value) else float(value)
+
+    def lookup(self, mix, water_binder, cement_fraction, age=28, exact=False):
+        """Strength at each (W/B, cement fraction) point of ``mix``; NaN where not covered.
+
+        ``mix`` supplies the SCM, fiber, limestone, silica fume and reference
+        inputs.  With ``exact`` only points on table nodes are answered.
+        """
+        water_binder = np.asarray(water_binder, dtype=float)
+        out = np.full(water_binder.shape, np.nan)
+        surface = self._surface(mix, age)
+        if surface is None:
+            return out
+
+        coords = [
+            np.full(water_binder.shape, float(mix['Limestone content (%)'])),
+            np.full(water_binder.shape, float(mix['Silica fume content (%)'])),
+            water_binder,
+            np.asarray(cement_fraction, dtype=float),
+        ]
+        names = ("limestone", "silica_fume", "water_binder", "cement_fraction")
+        indices, weights = [], []
+        covered = np.ones(water_binder.shape, dtype=bool)
+        for name, x in zip(names, coords):
+            idx, weight, inside = _axis_weights(self.axes[name], x)
+            covered &= inside
+            if exact:
+                covered &= (weight == 0.0) | (weight == 1.0)
+            indices.append(idx)
+            weights.append(weight)
+
+        value = np.zeros(water_binder.shape)
+        for corner in itertools.product((0, 1), repeat=len(names)):
+            w = np.ones(water_binder.shape)
+            for bit, weight in zip(corner, weights):
+                w = w * (weight if bit else 1.0 - weight)
+            value += w * surface[tuple(idx + bit for idx, bit in zip(indices, corner))]
+        out[covered] = value[covered]
+        return out
+
+
+def build(model, models_digest, reference=None, progress=None):
+    """Score the full table with the compressive ``model`` and return a :class:`SurfaceTable`.
+
+    ``reference`` overrides the fixed inputs (all 0 by default, as in the UI).
+    """
+    import pandas as pd
+
+    from .inference import predict_chunked
+
+    reference = {f: 0.0 for f in REFERENCE_FEATURES} | dict(reference or {})
+    unknown = set(reference) - set(REFERENCE_FEATURES)
+    if unknown:
+        raise ValueError(f"not a reference input: {', '.join(sorted(unknown))}")
+
+    axes = {
+        "fiber_type": np.array(sorted(set(fiber_type_options.values())), dtype=float),
+        "limestone": np.array(LIMESTONE),
+        "silica_fume": np.array(SILICA_FUME),
+        "age": np.array(AGES, dtype=float),
+        "water_binder": np.array(WATER_BINDER),
+        "cement_fraction": np.array(CEMENT_FRACTION),
+    }
+    scm_names = list(scm_defaults)
+    scm_inputs = np.array([[ssa, compute_nc(cao, al2o3, sio2)] for ssa, cao, al2o3, sio2 in scm_defaults.values()])
+
+    # One frame per SCM type: every fiber × limestone × silica fume × age × W/B × cement node
+    fiber, ls, sf, age, wb, frac = (a.ravel() for a in np.meshgrid(
+        axes["fiber_type"], axes["limestone"], axes["silica_fume"], axes["age"],
+        axes["water_binder"], axes["cement_fraction"], indexing='ij'))
+    K = 100 - ls - sf
+    block_shape = tuple(len(axes[name]) for name in ("fiber_type", "limestone", "silica_fume", "age", "water_binder", "cement_fraction"))
+    # float64 like the model's own predictions, so node lookups equal them exactly
+    strength = np.empty((len(scm_names),) + block_shape)
+
+    for i, (ssa, nc) in enumerate(scm_inputs):
+        columns = {
+            'Cement content (%)': frac * K,
+            'Limestone content (%)': ls,
+            'Silica fume content (%)': sf,
+            'SCM content (%)': K - frac * K,
+            'Nc': np.full(len(K), nc),
+            'SSA of SCM (m2/g)': np.full(len(K), ssa),
+            'Water/Binder': wb,
+            'Fiber Type': fiber,
+            'Age': age,
+        }
+        columns.update({f: np.full(len(K), value) for f, value in reference.items()})
+        with metrics.timed("surfaces.build"):
+            predicted = predict_chunked(model, pd.DataFrame(columns, columns=compressive_features_list),
+                                        name="stacking_model_C")
+        strength[i] = predicted.reshape(block_shape)
+        if progress is not None:
+            progress(i + 1, len(scm_names))
+
+    return SurfaceTable(strength, axes, scm_names, scm_inputs, reference, models_digest)
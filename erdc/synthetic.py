@@ -0,0 +1,61 @@
+"""Stand-in model artifact for benchmarks and offline work.
+
+Builds small stacking ensembles with the same keys and ``feature_names_in_`` as
+``3DP_November_2025.pkl``, trained on the matching database sheets.  The
+predictions are meaningless; only the structure and cost profile matter.
+"""
+import os
+
+from .mix import compressive_features_list, rheology_features_list
+
+# The five rheology targets follow the feature columns in the rheology sheet
+_RHEOLOGY_TARGET_OFFSET = len(rheology_features_list)
+
+
+def _stacking(random_state=0):
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor, StackingRegressor
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return StackingRegressor(
+        [
+            ('rf', RandomForestRegressor(n_estimators=50, random_state=random_state)),
+            ('gb', GradientBoostingRegressor(random_state=random_state)),
+            ('lr', make_pipeline(StandardScaler(), Ridge())),
+        ],
+        final_estimator=Ridge(),
+    )
+
+
+def _fit(X, y):
+    keep = y.notna()
+    return _stacking().fit(X[keep], y[keep])
+
+
+def build_models(database):
+    """Return ``{key: fitted model}`` for every key the app uses."""
+    models = {}
+    df = database["df_C_S"]
+    models['stacking_model_C'] = _fit(df[compressive_features_list], df.iloc[:, len(compressive_features_list)])
+
+    df = database["df_R"]
+    for i in range(5):
+        models[f'stacking_model_R{i + 1}'] = _fit(df[rheology_features_list], df.iloc[:, _RHEOLOGY_TARGET_OFFSET + i])
+
+    for key, sheet in (('stacking_model_L', "df_3D_L"), ('stacking_model_S', "df_3D_S")):
+        df = database[sheet]
+        models[key] = _fit(df.iloc[:, :-1], df.iloc[:, -1])
+    return models
+
+
+def write_models(path, database):
+    """Build the stand-in models and cloudpickle them to ``path`` (atomically)."""
+    import cloudpickle
+
+    models = build_models(database)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        cloudpickle.dump(models, f)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,31 @@
+"""Shared fixtures: small models with the feature names of the real artifact."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from erdc.mix import PRINTING_FEATURES, compressive_features_list, rheology_features_list, rheology_models
+
+MIX = {
+    'Cement content (%)': 60.0, 'Limestone content (%)': 10.0, 'Silica fume content (%)': 5.0,
+    'SCM content (%)': 25.0, 'Nc': 1.2, 'SSA of SCM (m2/g)': 1.5, 'Water/Binder': 0.35,
+    'Sand/Binder': 1.2, 'Aggregate/Binder': 0.0, 'Fiber length (mm)': 0.0, 'Fiber Volume (%)': 0.0,
+    'Fiber Type': "None", 'Mini-slump after joint': 200.0,
+}
+PRINTING = {'Printing speed (mm/s)': 30.0, 'nozzle size (mm)': 20.0, 'single layer height (mm)': 10.0}
+
+
+@pytest.fixture(scope="session")
+def models():
+    rng = np.random.default_rng(0)
+
+    def fit(features):
+        X = pd.DataFrame(rng.uniform(0, 100, (30, len(features))), columns=features)
+        return LinearRegression().fit(X, rng.uniform(0, 50, 30))
+
+    printing = [f for f in compressive_features_list if f != 'Age'] + PRINTING_FEATURES
+    models = {key: fit(rheology_features_list) for key in rheology_models.values()}
+    models['stacking_model_C'] = fit(compressive_features_list)
+    models['stacking_model_L'] = fit(printing)
+    models['stacking_model_S'] = fit(printing + ['Age'])
+    return models
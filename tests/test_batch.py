@@ -0,0 +1,62 @@
+"""Parsing and scoring of uploaded mix tables in ``erdc.batch``."""
+import csv
+import io
+import re
+
+import pandas as pd
+import pytest
+
+from erdc.batch import REQUIRED_FEATURES, iter_input_chunks, prepare_mixes, run_batch
+
+from .conftest import MIX, PRINTING
+
+OUTPUT_3DP = ["Maximum Printing Layers", "3DP Strength 7d (MPa)", "3DP Strength 28d (MPa)"]
+
+
+def _csv(rows):
+    return io.StringIO(pd.DataFrame(rows).to_csv(index=False))
+
+
+def _run(models, tmp_path, rows, **kwargs):
+    out = tmp_path / "out.csv"
+    n = run_batch(models, _csv(rows), "mixes.csv", str(out), **kwargs)
+    with open(out, newline='', encoding='utf-8') as f:
+        lines = list(csv.reader(f))
+    return n, lines
+
+
+def test_csv_fiber_name_none_is_not_missing(models, tmp_path):
+    n, lines = _run(models, tmp_path, [MIX, {**MIX, 'Fiber Type': "Steel"}])
+    result = pd.DataFrame(lines[1:], columns=lines[0])
+    assert n == 2
+    assert result['Fiber Type'].astype(float).tolist() == [0.0, 1.0]
+    assert (result["Compressive Strength 28d (MPa)"] != "").all()
+
+
+def test_unknown_fiber_names_row_and_column(models, tmp_path):
+    with pytest.raises(ValueError, match=r"row 2, column 'Fiber Type': unknown fiber type 'Carbon'"):
+        _run(models, tmp_path, [MIX, {**MIX, 'Fiber Type': "Carbon"}])
+
+
+@pytest.mark.parametrize("column", REQUIRED_FEATURES)
+def test_blank_required_input_names_row_and_column(column):
+    chunk = next(iter_input_chunks(_csv([MIX, {**MIX, column: ""}]), "mixes.csv"))
+    with pytest.raises(ValueError, match=re.escape(f"row 2, column '{column}': a value is required")):
+        prepare_mixes(chunk)
+
+
+def test_unparsable_number_names_row_and_column(models, tmp_path):
+    with pytest.raises(ValueError, match=r"row 1, column 'Water/Binder': 'abc' is not a number"):
+        _run(models, tmp_path, [{**MIX, 'Water/Binder': "abc"}])
+
+
+def test_chunks_share_the_first_chunks_columns(models, tmp_path):
+    # Only the first chunk has printing parameters filled in
+    rows = [{**MIX, **PRINTING}] + [{**MIX, **{k: "" for k in PRINTING}}] * 3
+    n, lines = _run(models, tmp_path, rows, chunk_size=1)
+    header = lines[0]
+    assert n == 4 and len(lines) == 5
+    assert all(len(line) == len(header) for line in lines[1:])
+    result = pd.DataFrame(lines[1:], columns=header)
+    assert (result.loc[0, OUTPUT_3DP] != "").all()
+    assert (result.loc[1:, OUTPUT_3DP] == "").all().all()
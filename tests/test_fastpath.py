@@ -0,0 +1,133 @@
+"""The compiled models of ``erdc.fastpath`` must match ``model.predict``."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import (
+    ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor, StackingRegressor,
+)
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+
+from erdc.fastpath import (
+    BUNDLE_MAX_ROWS, CompiledModel, FeatureOrderError, bundle_arrays, compile_model, tree_ensembles, use_bundle,
+)
+
+FEATURES = ['Cement content (%)', 'Water/Binder', 'Sand/Binder', 'Fiber Type', 'Age']
+RTOL = 1e-9
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(42)
+    X = pd.DataFrame({
+        'Cement content (%)': rng.uniform(40, 100, 300),
+        'Water/Binder': rng.uniform(0.2, 0.5, 300),
+        'Sand/Binder': rng.uniform(0, 2.5, 300),
+        'Fiber Type': rng.integers(0, 6, 300).astype(float),
+        'Age': rng.choice([7.0, 28.0], 300),
+    }, columns=FEATURES)
+    y = 0.5 * X['Cement content (%)'] - 80 * X['Water/Binder'] + np.log(X['Age']) * 5 + rng.normal(0, 1, 300)
+    return X, y
+
+
+def _stacking(passthrough=False):
+    return StackingRegressor(
+        [
+            ('rf', RandomForestRegressor(n_estimators=20, random_state=0)),
+            ('et', ExtraTreesRegressor(n_estimators=10, random_state=0)),
+            ('gb', GradientBoostingRegressor(n_estimators=30, random_state=0)),
+            ('lr', make_pipeline(StandardScaler(), Ridge())),
+            ('mm', make_pipeline(MinMaxScaler(), LinearRegression())),
+        ],
+        final_estimator=Ridge(),
+        passthrough=passthrough,
+    )
+
+
+ESTIMATORS = {
+    "stacking": lambda: _stacking(),
+    "stacking-passthrough": lambda: _stacking(passthrough=True),
+    "random-forest": lambda: RandomForestRegressor(n_estimators=20, random_state=0),
+    "gradient-boosting": lambda: GradientBoostingRegressor(n_estimators=30, random_state=0),
+    "decision-tree": lambda: DecisionTreeRegressor(random_state=0),
+    "pipeline": lambda: make_pipeline(StandardScaler(), Ridge()),
+}
+
+
+@pytest.fixture(scope="module", params=sorted(ESTIMATORS))
+def fitted(request, data):
+    X, y = data
+    return ESTIMATORS[request.param]().fit(X, y)
+
+
+def _probe(data, rows):
+    X, _ = data
+    # Fresh points as well as training rows, which sit exactly on split thresholds
+    rng = np.random.default_rng(7)
+    fresh = np.column_stack([
+        rng.uniform(40, 100, rows), rng.uniform(0.2, 0.5, rows), rng.uniform(0, 2.5, rows),
+        rng.integers(0, 6, rows), rng.choice([7.0, 28.0], rows),
+    ])
+    return np.vstack([X.to_numpy(float)[:rows], fresh])
+
+
+def _expected(model, X):
+    return np.asarray(model.predict(pd.DataFrame(X, columns=FEATURES)), dtype=float)
+
+
+def test_many_rows_match_predict(fitted, data):
+    X = _probe(data, 100)
+    assert len(X) > BUNDLE_MAX_ROWS
+    np.testing.assert_allclose(CompiledModel(fitted).predict(X), _expected(fitted, X), rtol=RTOL, atol=RTOL)
+
+
+@pytest.mark.parametrize("rows", [1, 3, BUNDLE_MAX_ROWS])
+def test_bundled_rows_match_predict(fitted, data, rows):
+    X = _probe(data, BUNDLE_MAX_ROWS)[-rows:]
+    np.testing.assert_allclose(CompiledModel(fitted).predict(X), _expected(fitted, X), rtol=RTOL, atol=RTOL)
+
+
+def test_predict_row_matches_predict(fitted, data):
+    X = _probe(data, 20)
+    compiled = CompiledModel(fitted)
+    expected = _expected(fitted, X)
+    for row, value in zip(X, expected):
+        assert compiled.predict_row(row) == pytest.approx(value, rel=RTOL, abs=RTOL)
+
+
+def test_verify_and_cache(fitted):
+    assert CompiledModel(fitted).verify() <= RTOL
+    compiled = compile_model(fitted)
+    assert compiled is not None
+    assert compile_model(fitted) is compiled
+
+
+def test_nested_feature_order_is_checked(data):
+    X, y = data
+    model = _stacking().fit(X, y)
+    # A base estimator fitted on the same columns in another order
+    model.estimators_[0] = RandomForestRegressor(n_estimators=5, random_state=0).fit(X[FEATURES[::-1]], y)
+    with pytest.raises(FeatureOrderError):
+        CompiledModel(model)
+    assert compile_model(model) is None
+
+
+def test_prebuilt_bundles_match_predict(fitted, data):
+    X = _probe(data, BUNDLE_MAX_ROWS)[-BUNDLE_MAX_ROWS:]
+    for estimator in tree_ensembles(fitted):
+        arrays, depth = bundle_arrays(estimator)
+        # Read-only, like the views of a model store file
+        arrays = {name: array.copy() for name, array in arrays.items()}
+        for array in arrays.values():
+            array.flags.writeable = False
+        assert use_bundle(estimator, arrays, depth)
+    np.testing.assert_allclose(CompiledModel(fitted).predict(X), _expected(fitted, X), rtol=RTOL, atol=RTOL)
+
+
+def test_bundle_of_another_ensemble_is_refused(data):
+    X, y = data
+    small = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, y)
+    large = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    assert not use_bundle(small, *bundle_arrays(large))
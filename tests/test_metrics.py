@@ -0,0 +1,52 @@
+"""Collection switch and periodic logging of ``erdc.metrics``."""
+import json
+import logging
+
+import pytest
+
+from erdc import metrics
+
+
+@pytest.fixture
+def collecting():
+    was = metrics.enabled()
+    metrics.reset()
+    metrics.enable()
+    metrics._last_logged = None
+    yield
+    metrics.enable(was)
+    metrics.reset()
+
+
+def test_disabled_timers_record_nothing():
+    was = metrics.enabled()
+    metrics.enable(False)
+    try:
+        with metrics.timed("test.stage"):
+            pass
+        assert "test.stage" not in metrics.snapshot()
+    finally:
+        metrics.enable(was)
+
+
+def test_log_snapshot_every_logs_once_per_interval(collecting, caplog):
+    with metrics.timed("test.stage"):
+        pass
+    with caplog.at_level(logging.INFO, logger="erdc.metrics"):
+        assert metrics.log_snapshot_every(60.0)
+        assert not metrics.log_snapshot_every(60.0)
+        assert metrics.log_snapshot_every(0.0)
+    records = [json.loads(r.getMessage()) for r in caplog.records if r.name == "erdc.metrics"]
+    assert len(records) == 2
+    assert records[0]["stages"]["test.stage"]["calls"] == 1
+
+
+def test_log_snapshot_every_is_silent_while_disabled(caplog):
+    was = metrics.enabled()
+    metrics.enable(False)
+    try:
+        with caplog.at_level(logging.INFO, logger="erdc.metrics"):
+            assert not metrics.log_snapshot_every(0.0)
+        assert not [r for r in caplog.records if r.name == "erdc.metrics"]
+    finally:
+        metrics.enable(was)
@@ -0,0 +1,70 @@
+"""Round trip of a model pickle through ``erdc.model_store``."""
+import json
+import os
+
+import cloudpickle
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor, StackingRegressor
+from sklearn.linear_model import Ridge
+
+from erdc import fastpath
+from erdc.model_store import MANIFEST, ModelStore, convert, is_current
+
+FEATURES = ['Cement content (%)', 'Water/Binder', 'Fiber Type']
+
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.uniform(0, 1, (200, len(FEATURES))), columns=FEATURES)
+    y = X.sum(axis=1) + rng.normal(0, 0.1, 200)
+    models = {
+        'stacking': StackingRegressor(
+            [('rf', RandomForestRegressor(n_estimators=10, random_state=0)),
+             ('gb', GradientBoostingRegressor(n_estimators=20, random_state=0))],
+            final_estimator=Ridge(),
+        ).fit(X, y),
+        'ridge': Ridge().fit(X, y),
+    }
+    path = tmp_path_factory.mktemp("store") / "models.pkl"
+    with open(path, 'wb') as f:
+        cloudpickle.dump(models, f)
+    return str(path), models, X
+
+
+def test_store_matches_the_pickle(source):
+    path, models, X = source
+    store = ModelStore(convert(path))
+    assert sorted(store) == sorted(models)
+    for key, model in models.items():
+        np.testing.assert_allclose(store[key].predict(X), model.predict(X), rtol=1e-12)
+
+
+def test_tree_bundles_are_mapped_from_the_store(source):
+    path, models, X = source
+    store = ModelStore(convert(path))
+    ensembles = list(fastpath.tree_ensembles(store['stacking']))
+    assert len(ensembles) == 2
+    for estimator in ensembles:
+        assert isinstance(fastpath._bundle(estimator).left.base, np.memmap)
+    compiled = fastpath.compile_model(store['stacking'])
+    assert compiled is not None
+    rows = X.to_numpy()[:fastpath.BUNDLE_MAX_ROWS]
+    np.testing.assert_allclose(compiled.predict(rows), models['stacking'].predict(X[:len(rows)]), rtol=1e-9)
+
+
+def test_store_of_another_format_is_not_current(source):
+    path, _, _ = source
+    store_dir = convert(path)
+    assert is_current(store_dir, path)
+    manifest_path = os.path.join(store_dir, MANIFEST)
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest["format"] = 1
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    assert not is_current(store_dir, path)
+    with pytest.raises(ValueError, match="convert-models"):
+        ModelStore(store_dir)
@@ -0,0 +1,90 @@
+"""Request validation and micro-batching of ``erdc.server``."""
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from erdc.server import InferenceServer, InferenceService, MicroBatcher
+
+from .conftest import MIX, PRINTING
+
+
+class _FailsOnNegative:
+    """Stand-in model whose predict fails for the whole input when any row is negative."""
+
+    def predict(self, frame):
+        if (frame.to_numpy() < 0).any():
+            raise ValueError("negative input")
+        return frame.to_numpy().sum(axis=1)
+
+
+def test_bad_request_does_not_fail_the_rest_of_its_batch():
+    batcher = MicroBatcher(_FailsOnNegative(), ["a", "b"], window=0.5)
+    try:
+        # Submitted within one window, so they are stacked into a single predict first
+        futures = [batcher.submit([[i, 1.0]]) for i in (1.0, -1.0, 2.0)]
+        assert futures[0].result(5) == pytest.approx([2.0])
+        with pytest.raises(ValueError, match="negative input"):
+            futures[1].result(5)
+        assert futures[2].result(5) == pytest.approx([3.0])
+    finally:
+        batcher.close()
+
+
+def test_non_finite_inputs_are_refused_before_queueing():
+    batcher = MicroBatcher(_FailsOnNegative(), ["a", "b"])
+    try:
+        with pytest.raises(ValueError, match="inputs must be finite numbers: b"):
+            batcher.submit([[1.0, np.nan]])
+    finally:
+        batcher.close()
+
+
+@pytest.fixture(scope="module")
+def server(models):
+    service = InferenceService(models, window=0.01)
+    server = InferenceServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url, json.dumps(payload).encode('utf-8'), {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.load(exc)
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/predict/rheology", MIX),
+    ("/predict/compressive", {**MIX, "ages": [28]}),
+    ("/predict/layer", {**MIX, **PRINTING}),
+    ("/predict/strength", {**MIX, **PRINTING}),
+])
+def test_valid_requests(server, path, payload):
+    status, body = _post(server + path, payload)
+    assert status == 200
+    assert all(np.isfinite(v) for v in body.values())
+
+
+@pytest.mark.parametrize("path, payload, message", [
+    ("/predict/compressive", {**MIX, "ages": []}, "'ages' must be a non-empty list of ages in [7, 28]"),
+    ("/predict/compressive", {**MIX, "ages": [14]}, "'ages' must be a non-empty list of ages in [7, 28]"),
+    ("/predict/strength", {**MIX, **PRINTING, "ages": "28"}, "'ages' must be a non-empty list"),
+    ("/predict/rheology", {**MIX, "Fiber Type": "Carbon"}, "unknown fiber type 'Carbon'; expected one of None, Steel"),
+    ("/predict/rheology", {**MIX, "Water/Binder": None}, "inputs must be finite numbers: Water/Binder"),
+    ("/predict/layer", MIX, "missing inputs: Printing speed (mm/s)"),
+])
+def test_bad_requests_get_descriptive_400s(server, path, payload, message):
+    status, body = _post(server + path, payload)
+    assert status == 400
+    assert message in body["error"]
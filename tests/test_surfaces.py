@@ -0,0 +1,44 @@
+"""Precomputed strength tables of ``erdc.surfaces`` against the model they were scored with."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from erdc.mix import compressive_features_list, compute_nc, scm_defaults
+from erdc.surfaces import SurfaceTable, build
+
+
+@pytest.fixture(scope="module")
+def table(models, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("surfaces") / "models.surfaces.npz")
+    build(models['stacking_model_C'], "digest").save(path)
+    return SurfaceTable.load(path)
+
+
+def _mix(scm, limestone, silica_fume, water_binder, cement_fraction, fiber=0.0):
+    ssa, cao, al2o3, sio2 = scm_defaults[scm]
+    K = 100 - limestone - silica_fume
+    return {
+        'Cement content (%)': cement_fraction * K, 'Limestone content (%)': limestone,
+        'Silica fume content (%)': silica_fume, 'SCM content (%)': K - cement_fraction * K,
+        'Nc': compute_nc(cao, al2o3, sio2), 'SSA of SCM (m2/g)': ssa, 'Water/Binder': water_binder,
+        'Sand/Binder': 0.0, 'Aggregate/Binder': 0.0, 'Fiber length (mm)': 0.0, 'Fiber Volume (%)': 0.0,
+        'Fiber Type': fiber,
+    }
+
+
+def test_table_is_float64(table):
+    assert table.strength.dtype == np.float64
+    assert table.models_digest == "digest"
+
+
+@pytest.mark.parametrize("scm", list(scm_defaults)[:3])
+@pytest.mark.parametrize("age", [7, 28])
+def test_node_lookups_match_the_model(table, models, scm, age):
+    mix = _mix(scm, 10.0, 20.0, 0.35, 0.75, fiber=2.0)
+    expected = models['stacking_model_C'].predict(pd.DataFrame([{**mix, 'Age': age}])[compressive_features_list])[0]
+    # Equal up to summation order, not the ~1e-6 MPa of a float32 table
+    assert table.lookup_mix(mix, age) == pytest.approx(expected, rel=1e-12)
+
+
+def test_off_node_mixes_are_not_answered_exactly(table):
+    assert table.lookup_mix(_mix(next(iter(scm_defaults)), 10.0, 20.0, 0.3525, 0.75), 28) is None